@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the generators, text helpers, exclusion loading and output
+
+Run from the project root:
+    python -m benchmarks.run_benchmarks --profile standard -o results.json
+    python -m benchmarks.run_benchmarks --compare results.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import islice
+
+from utils.data_loader import DataLoader
+from utils.file_manager import FileManager
+from utils.password_filter import PasswordFilter
+from utils.stream_utils import StreamUtils
+from utils.text_utils import TextUtils
+from generators.common_generator import CommonGenerator
+from generators.date_generator import DateGenerator
+from generators.word_generator import WordGenerator
+from generators.smart_generator import SmartGenerator
+from generators.mask_generator import MaskGenerator
+from generators.random_generator import RandomGenerator
+
+class BenchmarkSuite:
+    """Times each component against synthetic inputs of increasing size
+
+    Every benchmark runs in separate passes, so that tracemalloc and the
+    duplicate-counting set do not slow down the timed pass or inflate the
+    memory peak. Generator streams are cut off at max_candidates so runs
+    stay bounded and comparable across commits.
+    """
+
+    PROFILES = {
+        # words/dates feed the generators; lines sizes the exclusion files, helper inputs and saves
+        "quick": {"words": [10], "dates": [5], "lines": [100000]},
+        "standard": {"words": [10, 100], "dates": [5, 50], "lines": [100000, 1000000]},
+        "full": {"words": [10, 100, 1000], "dates": [5, 50, 500], "lines": [100000, 1000000, 10000000]}
+    }
+    DEFAULT_MAX_CANDIDATES = 2000000
+    EXCLUSION_DUPLICATE_RATE = 0.1  # Share of exclusion lines that repeat an earlier one
+    MIN_LEN = 6
+    MAX_LEN = 12
+
+    def __init__(self, profile="standard", max_candidates=DEFAULT_MAX_CANDIDATES, measure_memory=True, seed=1):
+        if profile not in self.PROFILES:
+            raise ValueError(f"Unknown benchmark profile: {profile}")
+        self.profile = profile
+        self.sizes = self.PROFILES[profile]
+        self.max_candidates = max_candidates
+        self.measure_memory = measure_memory
+        self.seed = seed
+        self.data_loader = DataLoader()
+        self.results = []
+        self.status_callback = None
+        self.work_dir = None
+
+    def set_status_callback(self, callback):
+        """Set callback function for status updates"""
+        self.status_callback = callback
+
+    def _update_status(self, message):
+        """Update status if callback is set"""
+        if self.status_callback:
+            self.status_callback(message)
+
+    # Synthetic inputs
+
+    def synthetic_words(self, count):
+        """Deterministic lowercase words of 4-8 letters"""
+        rng = random.Random(self.seed)
+        return [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 8))) for _ in range(count)]
+
+    def synthetic_dates(self, count):
+        """Deterministic dates in mixed formats, one per line"""
+        rng = random.Random(self.seed + 1)
+        formats = ["{d:02d}/{m:02d}/{y}", "{m:02d}-{d:02d}-{y}", "{y}", "{d}.{m}.{y}"]
+        lines = []
+        for _ in range(count):
+            values = {'d': rng.randint(1, 28), 'm': rng.randint(1, 12), 'y': rng.randint(1950, 2025)}
+            lines.append(rng.choice(formats).format(**values))
+        return "\n".join(lines)
+
+    def synthetic_passwords(self, count, variant=0):
+        """Deterministic passwords of letters and digits, with EXCLUSION_DUPLICATE_RATE repeats"""
+        rng = random.Random((self.seed + 2) * 1000 + variant)
+        alphabet = string.ascii_letters + string.digits
+        passwords = []
+        for _ in range(count):
+            if passwords and rng.random() < self.EXCLUSION_DUPLICATE_RATE:
+                passwords.append(rng.choice(passwords))
+            else:
+                passwords.append(''.join(rng.choices(alphabet, k=rng.randint(self.MIN_LEN, self.MAX_LEN))))
+        return passwords
+
+    def _exclusion_file(self, count):
+        """Write (once) an exclusion file of count lines and return its path"""
+        path = os.path.join(self.work_dir, f"exclusions_{count}.txt")
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                for batch in StreamUtils.batched(self.synthetic_passwords(count)):
+                    f.write("\n".join(batch))
+                    f.write("\n")
+        return path
+
+    # Measurement
+
+    def _record(self, group, name, params, count, byte_count, seconds, peak_memory, duplicate_ratio, truncated=False):
+        """Store one result and report it"""
+        result = {
+            'group': group,
+            'name': name,
+            'params': params,
+            'candidates': count,
+            'bytes': byte_count,
+            'seconds': round(seconds, 4),
+            'candidates_per_sec': round(count / seconds) if seconds > 0 else None,
+            'bytes_per_sec': round(byte_count / seconds) if seconds > 0 else None,
+            'peak_memory_bytes': peak_memory,
+            'duplicate_ratio': None if duplicate_ratio is None else round(duplicate_ratio, 6),
+            'truncated': truncated
+        }
+        self.results.append(result)
+        self._update_status(f"{name} {params}: {count:,} in {seconds:.2f}s "
+                            f"({result['candidates_per_sec'] or 0:,}/s)")
+        return result
+
+    def _peak_memory(self, run):
+        """Peak bytes allocated by Python while run() executes, or None when disabled"""
+        if not self.measure_memory:
+            return None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def measure_stream(self, group, name, params, make_stream):
+        """Benchmark a candidate stream; make_stream() must return a fresh iterable each call"""
+        def limited():
+            return islice(make_stream(), self.max_candidates)
+
+        # Timed pass: count candidates and their encoded size a batch at a time
+        gc.collect()
+        count = byte_count = 0
+        start = time.perf_counter()
+        for batch in StreamUtils.batched(limited()):
+            count += len(batch)
+            byte_count += len("\n".join(batch).encode('utf-8')) + 1
+        seconds = time.perf_counter() - start
+        byte_count -= 1 if count else 0
+
+        peak_memory = self._peak_memory(lambda: sum(1 for _ in limited()))
+
+        # Duplicate pass
+        unique_count = len(set(limited()))
+        duplicate_ratio = 1 - unique_count / count if count else 0.0
+
+        return self._record(group, name, params, count, byte_count, seconds, peak_memory,
+                            duplicate_ratio, count >= self.max_candidates)
+
+    def measure_task(self, group, name, params, task):
+        """Benchmark a task returning (items, bytes, unique items or None)"""
+        gc.collect()
+        start = time.perf_counter()
+        count, byte_count, unique_count = task()
+        seconds = time.perf_counter() - start
+
+        peak_memory = self._peak_memory(task)
+        duplicate_ratio = None
+        if unique_count is not None and count:
+            duplicate_ratio = 1 - unique_count / count
+        return self._record(group, name, params, count, byte_count, seconds, peak_memory, duplicate_ratio)
+
+    # Benchmarks
+
+    def _settings(self, case_variations):
+        return {
+            'use_case_variations': case_variations,
+            'min_len': self.MIN_LEN,
+            'max_len': self.MAX_LEN
+        }
+
+    def bench_generators(self):
+        """Each generator over the data lists, N user words and M dates, with case variations off and on"""
+        loader = self.data_loader
+        for case_variations in (False, True):
+            settings = self._settings(case_variations)
+            self.measure_stream("generators", "CommonGenerator", {'case_variations': case_variations},
+                                lambda: CommonGenerator(loader, **settings).iter_generate())
+
+            for date_count in self.sizes['dates']:
+                dates_text = self.synthetic_dates(date_count)
+                self.measure_stream("generators", "DateGenerator",
+                                    {'dates': date_count, 'case_variations': case_variations},
+                                    lambda: DateGenerator(loader, **settings).iter_generate(dates_text))
+
+            for word_count in self.sizes['words']:
+                words = self.synthetic_words(word_count)
+                self.measure_stream("generators", "WordGenerator",
+                                    {'words': word_count, 'case_variations': case_variations},
+                                    lambda: WordGenerator(loader, **settings).iter_generate(words))
+
+                dates_text = self.synthetic_dates(self.sizes['dates'][0])
+                self.measure_stream("generators", "SmartGenerator",
+                                    {'words': word_count, 'dates': self.sizes['dates'][0],
+                                     'case_variations': case_variations},
+                                    lambda: SmartGenerator(loader, **settings).iter_generate(
+                                        "\n".join(words), dates_text))
+
+        masks = ["?u?l?l?l?d?d", "?w?d?d?d"]
+        self.measure_stream("generators", "MaskGenerator", {'masks': masks},
+                            lambda: MaskGenerator(loader, **self._settings(False)).iter_generate(masks))
+
+        random_count = self.max_candidates
+        self.measure_stream("generators", "RandomGenerator", {'count': random_count},
+                            lambda: RandomGenerator().iter_generate(random_count, self.MIN_LEN, self.MAX_LEN))
+
+    def bench_text_utils(self):
+        """TextUtils helpers over increasing numbers of synthetic words and dates"""
+        for line_count in self.sizes['lines']:
+            word_count = min(line_count, self.max_candidates)
+            words = self.synthetic_words(word_count)
+
+            def case_variations(mode):
+                # Start cold so every word is expanded rather than served from the cache
+                TextUtils.set_case_cache_size(TextUtils.CASE_CACHE_SIZE)
+                for word in words:
+                    yield from TextUtils.cached_case_variations(word, mode)
+
+            for mode in (TextUtils.CASE_MODE_BASIC, TextUtils.CASE_MODE_COMPAT):
+                self.measure_stream("text_utils", "TextUtils.cached_case_variations",
+                                    {'words': word_count, 'mode': mode}, lambda: case_variations(mode))
+
+            self.measure_stream("text_utils", "TextUtils.to_leetspeak", {'words': word_count},
+                                lambda: map(TextUtils.to_leetspeak, words))
+
+            dates_text = self.synthetic_dates(word_count)
+            self.measure_stream("text_utils", "TextUtils.parse_dates", {'dates': word_count},
+                                lambda: iter(TextUtils.parse_dates(dates_text)))
+
+    def bench_password_filter(self):
+        """Parse exclusion files of increasing size, uncached and from the compiled cache"""
+        cache_dir = os.path.join(self.work_dir, "cache")
+        for line_count in self.sizes['lines']:
+            path = self._exclusion_file(line_count)
+            file_size = os.path.getsize(path)
+
+            def load(use_cache):
+                passwords = PasswordFilter(cache_dir, use_cache=use_cache).load_previous_passwords(path)
+                return line_count, file_size, len(passwords)
+
+            self.measure_task("password_filter", "PasswordFilter.load_previous_passwords",
+                              {'lines': line_count, 'cached': False}, lambda: load(False))
+
+            load(True)  # Compile the cache before timing cached loads
+            self.measure_task("password_filter", "PasswordFilter.load_previous_passwords",
+                              {'lines': line_count, 'cached': True}, lambda: load(True))
+
+            # Half the candidates are in the exclusion file, half are new
+            previous = PasswordFilter(use_cache=False).load_previous_passwords(path)
+            half = min(line_count, self.max_candidates) // 2
+            candidates = self.synthetic_passwords(half) + self.synthetic_passwords(half, variant=1)
+            self.measure_stream("password_filter", "PasswordFilter.filter_stream", {'lines': line_count},
+                                lambda: PasswordFilter().filter_stream(candidates, previous))
+
+    def bench_file_manager(self):
+        """save_with_splitting for increasing candidate counts, plain and compressed"""
+        output_dir = os.path.join(self.work_dir, "output")
+        for line_count in self.sizes['lines']:
+            candidates = self.synthetic_passwords(min(line_count, self.max_candidates))
+            for compression in (None, "gzip"):
+                def save():
+                    os.makedirs(output_dir, exist_ok=True)
+                    file_manager = FileManager()
+                    file_manager.set_compression(compression, 1)
+                    files = file_manager.save_with_splitting(
+                        iter(candidates), os.path.join(output_dir, "out"), "\n", ".txt")
+                    byte_count = sum(os.path.getsize(file) for file in files)
+                    shutil.rmtree(output_dir)
+                    return file_manager.written_count, byte_count, None
+
+                self.measure_task("file_manager", "FileManager.save_with_splitting",
+                                  {'candidates': len(candidates), 'compression': compression}, save)
+
+    def run(self, groups=None):
+        """Run the selected benchmark groups (all by default) and return the report"""
+        benchmarks = {
+            "generators": self.bench_generators,
+            "text_utils": self.bench_text_utils,
+            "password_filter": self.bench_password_filter,
+            "file_manager": self.bench_file_manager
+        }
+        self.results = []
+        self.work_dir = tempfile.mkdtemp(prefix="passcodes_bench_")
+        try:
+            for group in groups or benchmarks:
+                self._update_status(f"Running {group} benchmarks...")
+                benchmarks[group]()
+        finally:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            self.work_dir = None
+
+        return {
+            'commit': self._git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'profile': self.profile,
+            'max_candidates': self.max_candidates,
+            'results': self.results
+        }
+
+    @staticmethod
+    def _git_commit():
+        """Current commit hash, or None outside a git checkout"""
+        try:
+            return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                  check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+def result_key(result):
+    """Identify a benchmark across reports"""
+    return result['name'], json.dumps(result['params'], sort_keys=True)
+
+def compare_reports(baseline, current):
+    """Yield (name, params, baseline/s, current/s, speedup) for benchmarks in both reports"""
+    previous = {result_key(result): result for result in baseline['results']}
+    for result in current['results']:
+        old = previous.get(result_key(result))
+        if old is None or not old['candidates_per_sec'] or not result['candidates_per_sec']:
+            continue
+        yield (result['name'], result['params'], old['candidates_per_sec'], result['candidates_per_sec'],
+               result['candidates_per_sec'] / old['candidates_per_sec'])
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the passcode generator components.")
+    parser.add_argument("--profile", choices=sorted(BenchmarkSuite.PROFILES), default="standard",
+                        help="input sizes: quick, standard (default) or full (exclusion files up to 1e7 lines)")
+    parser.add_argument("--group", action="append", choices=["generators", "text_utils", "password_filter",
+                                                             "file_manager"],
+                        help="run only these benchmark groups (may be repeated)")
+    parser.add_argument("--max-candidates", type=int, default=BenchmarkSuite.DEFAULT_MAX_CANDIDATES,
+                        help="stop each generator after this many candidates (default: 2,000,000)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="print the speedup against an earlier JSON report")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print progress to stderr")
+    args = parser.parse_args(argv)
+
+    suite = BenchmarkSuite(args.profile, args.max_candidates, not args.no_memory)
+    if not args.quiet:
+        suite.set_status_callback(lambda msg: print(msg, file=sys.stderr))
+    report = suite.run(args.group)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        for name, params, old_rate, new_rate, speedup in compare_reports(baseline, report):
+            print(f"{name} {json.dumps(params, sort_keys=True)}: {old_rate:,}/s -> {new_rate:,}/s ({speedup:.2f}x)",
+                  file=sys.stderr)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Advanced Passcode Generator
+Headless command-line entry point (never imports tkinter)
+"""
+
+import argparse
+import os
+import sys
+
+from engine.generation_engine import GenerationEngine, GenerationOptions
+from utils.data_loader import DataLoader
+from utils.file_manager import FileManager
+from utils.password_filter import PasswordFilter
+from utils.compressed_writer import CompressedWriter
+from utils.leet_engine import LeetExpander
+from utils.pipeline_metrics import PipelineMetrics
+
+def build_parser():
+    """Build the command-line argument parser"""
+    parser = argparse.ArgumentParser(
+        description="Generate passcode wordlists without the GUI."
+    )
+
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file (split into 1GB parts if needed), or '-' for stdout (default)")
+    parser.add_argument("--min-length", type=int, default=6, help="minimum passcode length (default: 6)")
+    parser.add_argument("--max-length", type=int, default=12, help="maximum passcode length (default: 12)")
+    parser.add_argument("--delimiter", default="newline",
+                        help="newline, comma, semicolon, tab, space, pipe or any custom text "
+                             "(escape sequences \\n, \\t, \\r are supported)")
+    parser.add_argument("--case-variations", action="store_true",
+                        help="generate ALL upper/lowercase combinations (can be MASSIVE)")
+    parser.add_argument("--case-mode", choices=["compat", "extended"], default="compat",
+                        help="compat only varies all-letter words; extended also varies the letters "
+                             "of mixed words like pass123 (default: compat)")
+
+    parser.add_argument("--leet-max", type=int, default=LeetExpander.DEFAULT_MAX_SUBSTITUTIONS, metavar="N",
+                        help="leetspeak variants replace 1 to N characters, plus the fully substituted word "
+                             f"(0 = no leetspeak; default: {LeetExpander.DEFAULT_MAX_SUBSTITUTIONS})")
+    parser.add_argument("--leet-table", metavar="FILE",
+                        help="leetspeak substitutions, one character and its replacements per line, e.g. 'a 4 @'")
+
+    parser.add_argument("--words", nargs="*", default=[], help="important words/names")
+    parser.add_argument("--words-file", help="file with one important word/name per line")
+    parser.add_argument("--dates", nargs="*", default=[], help="important dates, e.g. 01/15/1990 2023")
+    parser.add_argument("--dates-file", help="file with one important date per line")
+    parser.add_argument("--random-count", type=int, default=100, help="number of random passcodes (default: 100)")
+    parser.add_argument("--random-alphabet", metavar="CHARS",
+                        help="characters used for random passcodes (default: letters and digits)")
+    parser.add_argument("--mask", nargs="*", default=[],
+                        help="masks such as ?u?l?l?l?d?d or admin?d?d?s "
+                             "(?l ?u ?d ?s ?a, ?w/?p/?t data lists, ?1-?4 custom charsets, ?? for '?')")
+    parser.add_argument("--mask-file", help="file with one mask per line")
+    parser.add_argument("--custom-charset", action="append", default=[], metavar="N=CHARS",
+                        help="define custom charset ?N (1-4), e.g. 1=abc?d; may be repeated")
+    parser.add_argument("--mask-skip", type=int, default=0, metavar="N",
+                        help="start at candidate N of the masks' keyspace (resume/split)")
+    parser.add_argument("--mask-limit", type=int, metavar="N", help="generate at most N mask candidates")
+    parser.add_argument("--common-passwords", metavar="FILE",
+                        help="use this wordlist instead of the bundled common passwords (any size; memory-mapped)")
+    parser.add_argument("--common-patterns", metavar="FILE",
+                        help="use this wordlist instead of the bundled common patterns")
+    parser.add_argument("--common-words", metavar="FILE",
+                        help="use this wordlist instead of the bundled common words")
+    parser.add_argument("--exclude", metavar="FILE",
+                        help="previous password file (.txt, .csv, .tsv) or compiled index whose entries are excluded")
+    parser.add_argument("--exclude-index", nargs="?", const="", metavar="INDEX",
+                        help="check exclusions against an on-disk sorted index instead of loading them into memory; "
+                             "built from --exclude on first use (default path: <exclude file>.pwindex)")
+
+    parser.add_argument("--cache", action="store_true",
+                        help="cache the parsed exclusion file (a compressed copy of its passwords) "
+                             "so later runs skip re-parsing it")
+    parser.add_argument("--cache-dir", help="directory for exclusion file caches, implies --cache "
+                                            "(default: ~/.cache/password-list-generator)")
+
+    parser.add_argument("--no-common", action="store_true", help="skip common passwords and patterns")
+    parser.add_argument("--no-dates", action="store_true", help="skip date-based passcodes")
+    parser.add_argument("--no-words", action="store_true", help="skip word-based passcodes")
+    parser.add_argument("--no-combinations", action="store_true", help="skip smart combinations")
+    parser.add_argument("--no-random", action="store_true", help="skip random passcodes")
+
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for sharded generation, 0 = one per CPU core (default: 1)")
+
+    parser.add_argument("--shard-index", type=int, default=0, metavar="I",
+                        help="generate shard I (0-based) of a job split across --shard-count machines")
+    parser.add_argument("--shard-count", type=int, default=1, metavar="N",
+                        help="number of machines the job is split across (default: 1)")
+    parser.add_argument("--shard-by", choices=GenerationEngine.SHARD_MODES, default="hash",
+                        help="hash keeps candidates by CRC32, so shards never share a passcode; units splits "
+                             "the generators' outer loops, so each machine generates less but shards can overlap "
+                             "(default: hash)")
+
+    parser.add_argument("--dedup-memory", type=int, metavar="MB",
+                        help="deduplicate out of core, spilling sorted runs to disk beyond MB megabytes "
+                             "(output is then sorted); without it every unique passcode is kept in memory, "
+                             "so memory grows with the output")
+    parser.add_argument("--sort", action="store_true", help="write the passcodes in sorted order")
+
+    parser.add_argument("--compress", choices=sorted(CompressedWriter.EXTENSIONS),
+                        help="stream the output files through gzip, bz2 or xz (adds .gz/.bz2/.xz)")
+    parser.add_argument("--compress-level", type=int, metavar="N",
+                        help="compression level, 1-9 for gzip/bz2 (default 9) or 0-9 for the xz preset (default 6)")
+    parser.add_argument("--split-on-compressed", action="store_true",
+                        help="split output parts at 1GB of compressed rather than uncompressed data")
+
+    parser.add_argument("--checkpoint", nargs="?", const="", metavar="FILE",
+                        help="save progress periodically so an interrupted run can be resumed "
+                             "(default path: <output>.checkpoint)")
+    parser.add_argument("--checkpoint-interval", type=int, default=60, metavar="SECONDS",
+                        help="seconds between checkpoints (default: 60)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the checkpoint if there is one, appending to the saved parts "
+                             "(implies --checkpoint)")
+
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="save per-stage wall/CPU time, candidate counts and duplicate ratios as JSON "
+                             "and print them as each stage finishes")
+    parser.add_argument("--metrics-memory", action="store_true",
+                        help="also record each stage's peak memory (tracemalloc; slows generation down)")
+    parser.add_argument("--profile", metavar="STAGE",
+                        choices=GenerationEngine.STAGES + PipelineMetrics.PIPELINE_STAGES,
+                        help="run cProfile over one stage: " +
+                             ", ".join(GenerationEngine.STAGES + PipelineMetrics.PIPELINE_STAGES))
+    parser.add_argument("--profile-output", metavar="FILE",
+                        help="pstats file for --profile (default: <STAGE>.prof)")
+
+    parser.add_argument("--estimate", action="store_true",
+                        help="print the candidate count and output size per generator, then exit")
+
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print status messages to stderr")
+    return parser
+
+def _read_lines(file_path):
+    """Read non-empty lines from a text file, raising ValueError if it cannot be read"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        raise ValueError(f"{file_path} not found")
+    except UnicodeDecodeError:
+        raise ValueError(f"{file_path} is not a UTF-8 text file")
+    except OSError as e:
+        raise ValueError(f"Could not read {file_path}: {e.strerror or e}")
+
+def _read_leet_table(file_path):
+    """Parse and check a --leet-table file, raising ValueError that names the file"""
+    lines = _read_lines(file_path)
+    try:
+        table = LeetExpander.parse_table(lines)
+        # Rejects keys that are not single characters
+        LeetExpander(table)
+    except ValueError as e:
+        raise ValueError(f"Bad leetspeak table {file_path}: {e}")
+    return table
+
+def options_from_args(args):
+    """Convert parsed arguments into engine options"""
+    words = list(args.words)
+    if args.words_file:
+        words.extend(_read_lines(args.words_file))
+
+    dates = list(args.dates)
+    if args.dates_file:
+        dates.extend(_read_lines(args.dates_file))
+
+    masks = list(args.mask)
+    if args.mask_file:
+        masks.extend(_read_lines(args.mask_file))
+
+    custom_charsets = {}
+    for definition in args.custom_charset:
+        key, separator, chars = definition.partition("=")
+        if not separator:
+            raise ValueError(f"Custom charset '{definition}' must look like N=CHARS")
+        custom_charsets[key] = chars
+
+    leet_table = None
+    if args.leet_table:
+        leet_table = _read_leet_table(args.leet_table)
+
+    checkpoint_path = None
+    if args.checkpoint is not None or args.resume:
+        checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+
+    if args.delimiter in GenerationEngine.DELIMITERS:
+        delimiter = GenerationEngine.resolve_delimiter(args.delimiter)
+    else:
+        delimiter = GenerationEngine.resolve_delimiter("custom", args.delimiter)
+
+    return GenerationOptions(
+        min_length=args.min_length,
+        max_length=args.max_length,
+        delimiter=delimiter,
+        use_case_variations=args.case_variations,
+        case_mode=args.case_mode,
+        include_common=not args.no_common,
+        include_dates=not args.no_dates,
+        include_words=not args.no_words,
+        include_combinations=not args.no_combinations,
+        include_random=not args.no_random,
+        words_text="\n".join(words),
+        dates_text="\n".join(dates),
+        num_random=args.random_count,
+        random_alphabet=args.random_alphabet,
+        mask_text="\n".join(masks),
+        custom_charsets=custom_charsets,
+        mask_skip=args.mask_skip,
+        mask_limit=args.mask_limit,
+        leet_table=leet_table,
+        leet_max_substitutions=args.leet_max,
+        previous_file=args.exclude,
+        use_previous_index=args.exclude_index is not None,
+        previous_index_path=args.exclude_index or None,
+        workers=args.workers or os.cpu_count() or 1,
+        dedup_memory_budget=args.dedup_memory * 1024 * 1024 if args.dedup_memory else None,
+        sort_output=args.sort,
+        compression=args.compress,
+        compression_level=args.compress_level,
+        split_on_compressed=args.split_on_compressed,
+        checkpoint_path=checkpoint_path,
+        checkpoint_interval=args.checkpoint_interval,
+        resume=args.resume,
+        shard_index=args.shard_index,
+        shard_count=args.shard_count,
+        shard_by=args.shard_by,
+        metrics_path=args.metrics,
+        track_memory=args.metrics_memory,
+        profile_stage=args.profile,
+        profile_path=args.profile_output or (f"{args.profile}.prof" if args.profile else None)
+    )
+
+def _format_stage(stage):
+    """One status line for a finished stage's metrics"""
+    line = f"[{stage.name}] {stage.wall_time:.2f}s wall, {stage.cpu_time:.2f}s CPU, "
+    if stage.items_in is not None:
+        line += f"{stage.items_in:,} in, "
+    line += f"{stage.items_out:,} out"
+    if stage.duplicate_ratio is not None:
+        line += f", {stage.duplicate_ratio:.1%} duplicates"
+    if stage.peak_memory is not None:
+        line += f", peak {FileManager.format_size(stage.peak_memory)}"
+    return line
+
+def main(argv=None):
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+
+    try:
+        data_loader = DataLoader(args.common_passwords, args.common_patterns, args.common_words)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    engine = GenerationEngine(data_loader=data_loader,
+                              password_filter=PasswordFilter(args.cache_dir,
+                                                             use_cache=args.cache or args.cache_dir is not None))
+    if not args.quiet:
+        engine.set_status_callback(lambda msg: print(msg, file=sys.stderr))
+        if args.metrics or args.metrics_memory:
+            engine.set_metrics_callback(lambda stage: print(_format_stage(stage), file=sys.stderr))
+
+    try:
+        options = options_from_args(args)
+        engine.validate(options)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if args.estimate:
+        estimate = engine.estimate(options)
+        for name, (count, byte_count) in estimate['stages'].items():
+            print(f"{name}: {count:,} candidates, {FileManager.format_size(byte_count)}")
+        print(f"total: up to {estimate['candidates']:,} passcodes, "
+              f"{FileManager.format_size(estimate['bytes'])} before duplicates are removed")
+        return 0
+
+    if args.output == "-" and args.compress:
+        print("Error: --compress needs an output file (-o)", file=sys.stderr)
+        return 2
+    if args.output == "-" and options.checkpoint_path:
+        print("Error: --checkpoint and --resume need an output file (-o)", file=sys.stderr)
+        return 2
+
+    if args.output == "-":
+        try:
+            written_count = engine.write_stream(options, sys.stdout)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader (e.g. head) has all it wants; send the rest of the final flush nowhere
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            os.close(devnull)
+            return 0
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        files_created = []
+    else:
+        output = args.output
+        if args.compress and output.endswith(CompressedWriter.EXTENSIONS[args.compress]):
+            # The compression extension is added back when the parts are written
+            output = output[:-len(CompressedWriter.EXTENSIONS[args.compress])]
+        base_filename, file_extension = os.path.splitext(output)
+        if not file_extension:
+            file_extension = GenerationEngine.file_extension_for(args.delimiter)
+        try:
+            files_created = engine.save(options, base_filename, file_extension)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        written_count = engine.file_manager.written_count
+
+    if not args.quiet:
+        for file in files_created:
+            print(f"Saved to: {file}", file=sys.stderr)
+        print(f"Completed! Generated {written_count:,} unique passcodes", file=sys.stderr)
+
+    return 0 if written_count else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
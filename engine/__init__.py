@@ -0,0 +1,3 @@
+"""Generation pipeline shared by the GUI and the command line"""
+
+from .generation_engine import GenerationEngine, GenerationOptions
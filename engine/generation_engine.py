@@ -0,0 +1,762 @@
+"""
+Generation engine that runs the full passcode pipeline without any GUI
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from itertools import islice
+
+from utils.data_loader import DataLoader
+from utils.file_manager import FileManager
+from utils.password_filter import PasswordFilter
+from utils.stream_utils import StreamUtils, GenerationCancelled
+from utils.external_sort import ExternalDeduplicator
+from utils.password_index import PasswordIndex
+from utils.compressed_writer import CompressedWriter
+from utils.checkpoint import Checkpoint
+from utils.pipeline_metrics import PipelineMetrics
+from utils.text_utils import TextUtils
+from utils.leet_engine import LeetExpander
+from generators.common_generator import CommonGenerator
+from generators.date_generator import DateGenerator
+from generators.word_generator import WordGenerator
+from generators.random_generator import RandomGenerator
+from generators.smart_generator import SmartGenerator
+from generators.mask_generator import MaskGenerator
+
+class GenerationOptions:
+    def __init__(self, min_length=6, max_length=12, delimiter="\n",
+                 use_case_variations=False, case_mode=TextUtils.CASE_MODE_COMPAT, include_common=True, include_dates=True,
+                 include_words=True, include_combinations=True, include_random=True,
+                 words_text="", dates_text="", num_random=100, previous_file=None, workers=1,
+                 dedup_memory_budget=None, sort_output=False, use_previous_index=False,
+                 previous_index_path=None, compression=None, compression_level=None,
+                 split_on_compressed=False, random_alphabet=None, mask_text="", custom_charsets=None,
+                 mask_skip=0, mask_limit=None, checkpoint_path=None, checkpoint_interval=60, resume=False,
+                 shard_index=0, shard_count=1, shard_by="hash", metrics_path=None, track_memory=False,
+                 profile_stage=None, profile_path=None, leet_table=None,
+                 leet_max_substitutions=LeetExpander.DEFAULT_MAX_SUBSTITUTIONS):
+        self.min_length = min_length
+        self.max_length = max_length
+        self.delimiter = delimiter
+        self.use_case_variations = use_case_variations
+        self.case_mode = case_mode
+        self.include_common = include_common
+        self.include_dates = include_dates
+        self.include_words = include_words
+        self.include_combinations = include_combinations
+        self.include_random = include_random
+        self.words_text = words_text
+        self.dates_text = dates_text
+        self.num_random = num_random
+        self.random_alphabet = random_alphabet  # None uses letters and digits
+        # Masks, one per line, numbered as one keyspace that skip/limit slice
+        self.mask_text = mask_text
+        self.custom_charsets = custom_charsets or {}
+        self.mask_skip = mask_skip
+        self.mask_limit = mask_limit
+        self.previous_file = previous_file
+        self.workers = workers
+        # None keeps dedup in memory; a byte budget spills sorted runs to disk
+        self.dedup_memory_budget = dedup_memory_budget
+        self.sort_output = sort_output
+        # Check exclusions against an on-disk index instead of an in-memory set
+        self.use_previous_index = use_previous_index
+        self.previous_index_path = previous_index_path
+        # Stream output through gzip/bz2/xz, optionally splitting on compressed size
+        self.compression = compression
+        self.compression_level = compression_level
+        self.split_on_compressed = split_on_compressed
+        # Save progress every checkpoint_interval seconds; resume continues from a saved checkpoint
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.resume = resume
+        # Multi-node runs: this node makes shard shard_index of shard_count, split by candidate
+        # hash (shards never overlap) or by outer-loop units (generation is divided too)
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.shard_by = shard_by
+        # Per-stage metrics saved as JSON; peak memory uses tracemalloc, which slows the run down
+        self.metrics_path = metrics_path
+        self.track_memory = track_memory
+        # cProfile one stage (a generator, dedup, exclusion or write), saving pstats to profile_path
+        self.profile_stage = profile_stage
+        self.profile_path = profile_path
+        # Leetspeak substitutions: {char: replacements} (None = built-in table) and the most per variant
+        self.leet_table = leet_table
+        self.leet_max_substitutions = leet_max_substitutions
+
+    def fingerprint(self):
+        """Hash of the options that decide the output, so a checkpoint is only resumed by the same run"""
+        settings = {name: value for name, value in vars(self).items()
+                    if name not in ("checkpoint_path", "checkpoint_interval", "resume", "metrics_path",
+                                    "track_memory", "profile_stage", "profile_path")}
+        return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get_words(self):
+        """Return the user words as a list, one per line"""
+        if not self.words_text.strip():
+            return []
+        return self.words_text.strip().split('\n')
+
+    def get_masks(self):
+        """Return the masks as a list, one per non-empty line"""
+        return [line.strip() for line in self.mask_text.split('\n') if line.strip()]
+
+def _run_generator_shard(task):
+    """Process-pool worker: expand one shard of a generator into a temp file"""
+    generator, args, shard_index, shard_count, hash_shard, temp_dir = task
+    cache_start = TextUtils.case_cache_info()
+
+    # The generator carries its length bounds, so only in-range candidates are built
+    generator.split_shard(shard_index, shard_count)
+    passcodes = generator.iter_generate(*args)
+    if hash_shard is not None:
+        passcodes = StreamUtils.hash_shard(passcodes, *hash_shard)
+
+    # Dedup within the shard so the parent merges less; candidates never contain
+    # newlines, but may contain '\r', so no newline translation is done either way
+    fd, path = tempfile.mkstemp(prefix=f"shard{shard_index}_", suffix=".txt", dir=temp_dir)
+    count = 0
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='\n') as f:
+        for batch in StreamUtils.batched(StreamUtils.unique(passcodes)):
+            f.write("\n".join(batch))
+            f.write("\n")
+            count += len(batch)
+
+    # The worker's case variation cache is its own, so report what it saved
+    cache_info = TextUtils.case_cache_info()
+    cache_stats = (cache_info.hits - cache_start.hits, cache_info.misses - cache_start.misses)
+    return path, count, cache_stats
+
+class GenerationEngine:
+    POLL_INTERVAL_SECONDS = 0.2
+    STAGES = ("common", "dates", "words", "smart", "masks", "random")
+    SHARD_MODES = ("hash", "units")
+
+    DELIMITERS = {
+        "newline": "\n",
+        "comma": ",",
+        "semicolon": ";",
+        "tab": "\t",
+        "space": " ",
+        "pipe": "|"
+    }
+
+    def __init__(self, data_loader=None, file_manager=None, password_filter=None):
+        self.data_loader = data_loader or DataLoader()
+        self.file_manager = file_manager or FileManager()
+        self.password_filter = password_filter or PasswordFilter()
+        self.status_callback = None
+        self.metrics_callback = None
+        # Stage metrics of the last run; disabled unless a callback, report or profile asks for them
+        self.metrics = PipelineMetrics(enabled=False)
+        self.stage_counts = {}
+        self.unique_count = 0
+        self.case_cache_stats = {'hits': 0, 'misses': 0}
+        self._case_cache_start = TextUtils.case_cache_info()
+        # Cache use reported by worker processes, which each have their own cache
+        self._worker_case_cache = {'hits': 0, 'misses': 0}
+        # Checkpointing: the stage and unit being generated, snapshots per output batch, where to resume
+        self._checkpointing = False
+        self._stage = None
+        self._unit = None
+        self._unit_start = 0
+        self._snapshots = {}
+        self._resume_position = None
+        self.cancel_event = threading.Event()
+        self.file_manager.set_cancel_event(self.cancel_event)
+
+    def set_status_callback(self, callback):
+        """Set callback function for status updates"""
+        self.status_callback = callback
+        self.file_manager.set_status_callback(callback)
+        self.password_filter.set_status_callback(callback)
+
+    def set_metrics_callback(self, callback):
+        """Set callback function called with each stage's StageMetrics once the stage is done"""
+        self.metrics_callback = callback
+
+    def _update_status(self, message):
+        """Update status if callback is set"""
+        if self.status_callback:
+            self.status_callback(message)
+
+    def cancel(self):
+        """Ask a running generation to stop at the next batch boundary
+
+        The request stays in force until reset_cancel(), so a cancel made
+        before a worker thread gets going is not lost.
+        """
+        self.cancel_event.set()
+
+    def reset_cancel(self):
+        """Clear an earlier cancel; call before starting a run, on the thread that may cancel it"""
+        self.cancel_event.clear()
+
+    def _check_cancelled(self):
+        """Raise GenerationCancelled if cancel() has been called"""
+        if self.cancel_event.is_set():
+            raise GenerationCancelled("Generation cancelled")
+
+    @staticmethod
+    def resolve_delimiter(option, custom=""):
+        """Turn a delimiter name or custom text into the delimiter string"""
+        if option == "custom":
+            # Handle escape sequences
+            custom = custom.replace("\\n", "\n")
+            custom = custom.replace("\\t", "\t")
+            custom = custom.replace("\\r", "\r")
+            return custom if custom else "\n"  # Default to newline if empty
+
+        return GenerationEngine.DELIMITERS.get(option, "\n")  # Default fallback
+
+    @staticmethod
+    def file_extension_for(option, compression=None):
+        """Get appropriate file extension based on delimiter name and compression"""
+        if option == "comma":
+            extension = ".csv"
+        elif option == "tab":
+            extension = ".tsv"
+        else:
+            extension = ".txt"
+
+        if compression:
+            extension += CompressedWriter.EXTENSIONS[compression]
+        return extension
+
+    @property
+    def generated_count(self):
+        """Number of length-filtered candidates produced by the last run"""
+        return sum(self.stage_counts.values())
+
+    @property
+    def duplicate_ratio(self):
+        """Share of the last run's candidates that deduplication dropped (None before any)"""
+        if not self.generated_count:
+            return None
+        return 1 - self.unique_count / self.generated_count
+
+    def validate(self, options):
+        """Raise ValueError if the options cannot produce a run"""
+        if options.min_length < 0 or options.max_length < 0:
+            raise ValueError("Passcode lengths cannot be negative!")
+        if options.min_length > options.max_length:
+            raise ValueError("Minimum length cannot be greater than maximum length!")
+        if options.previous_file and not os.path.isfile(options.previous_file):
+            raise ValueError(f"Previous password file not found: {options.previous_file}")
+        if options.workers < 1:
+            raise ValueError("Number of worker processes must be at least 1!")
+        if options.dedup_memory_budget is not None and options.dedup_memory_budget <= 0:
+            raise ValueError("Deduplication memory budget must be positive!")
+        if options.compression is not None:
+            CompressedWriter.check_level(options.compression, options.compression_level)
+        if options.random_alphabet and len(set(options.random_alphabet)) > RandomGenerator.MAX_ALPHABET_SIZE:
+            raise ValueError(f"Random alphabet can have at most {RandomGenerator.MAX_ALPHABET_SIZE} characters!")
+        if options.mask_skip < 0 or (options.mask_limit is not None and options.mask_limit < 0):
+            raise ValueError("Mask skip and limit cannot be negative!")
+        # Raises ValueError for a negative cap or malformed table
+        LeetExpander(options.leet_table, options.leet_max_substitutions)
+        if options.get_masks():
+            # Raises ValueError for unknown charsets or malformed masks
+            MaskGenerator(self.data_loader, options.custom_charsets).keyspace(options.get_masks())
+        if options.checkpoint_path:
+            if options.sort_output or options.dedup_memory_budget:
+                raise ValueError("Checkpoints cannot be used with sorted output or out-of-core deduplication!")
+            if options.checkpoint_interval <= 0:
+                raise ValueError("Checkpoint interval must be positive!")
+        if options.shard_count < 1 or not 0 <= options.shard_index < options.shard_count:
+            raise ValueError("Shard index must be between 0 and the shard count minus 1!")
+        if options.shard_by not in self.SHARD_MODES:
+            raise ValueError(f"Shards are split by {' or '.join(self.SHARD_MODES)}, not '{options.shard_by}'")
+        if options.profile_stage and options.profile_stage not in self.STAGES + PipelineMetrics.PIPELINE_STAGES:
+            raise ValueError(f"Cannot profile unknown stage '{options.profile_stage}'")
+
+    def iter_passcodes(self, options, resume=None):
+        """Lazily yield unique passcodes with previous passwords excluded
+
+        resume is a saved checkpoint state: generation continues from its
+        position, skipping the passcodes already in its output parts.
+        """
+        self.validate(options)
+
+        enabled = bool(self.metrics_callback or options.metrics_path or options.track_memory
+                       or options.profile_stage)
+        # Checkpoint positions are taken as candidates are consumed, so nothing may be read ahead
+        batch_size = 1 if options.checkpoint_path else PipelineMetrics.DEFAULT_BATCH_SIZE
+        self.metrics = PipelineMetrics(enabled, options.track_memory, options.profile_stage,
+                                       self.metrics_callback, batch_size)
+        self.metrics.start()
+
+        # Load previous passwords if exclusion is enabled
+        previous_passwords = set()
+        if options.previous_file:
+            with self.metrics.running("exclusion"):
+                previous_passwords = self._load_previous(options)
+
+        try:
+            self._check_cancelled()
+            passcodes = self._build_stream(options, resume, previous_passwords)
+        except BaseException:
+            if isinstance(previous_passwords, PasswordIndex):
+                previous_passwords.close()
+            raise
+
+        if isinstance(previous_passwords, PasswordIndex):
+            passcodes = self._closing(passcodes, previous_passwords)
+        return passcodes
+
+    def _build_stream(self, options, resume, previous_passwords):
+        """Chain the generators, deduplication, exclusion and checkpoint snapshots lazily"""
+        self.stage_counts = {}
+        self._case_cache_start = TextUtils.case_cache_info()
+        self._worker_case_cache = {'hits': 0, 'misses': 0}
+        self._checkpointing = bool(options.checkpoint_path)
+        self._resume_position = None
+
+        seen = None
+        self.unique_count = 0
+        if resume is not None:
+            self._update_status("Reading passcodes saved before the checkpoint...")
+            with self.metrics.running("dedup"):
+                seen = set(StreamUtils.cancellable(
+                    self.file_manager.read_passcodes(resume['output']['files'], options.delimiter),
+                    self.cancel_event))
+            self.stage_counts = dict(resume['stage_counts'])
+            self.unique_count = len(seen)
+            self._resume_position = resume['position']
+            self._update_status(f"Resuming after {len(seen):,} saved passcodes "
+                                f"in the {self._resume_position['stage']} stage")
+
+        # Chain every generator into one lazy stream and deduplicate it
+        passcodes = self._count_unique(self._deduplicate(self._iter_all_passcodes(options), options, seen))
+        # Only streaming dedup passes each candidate on right after its generator made it
+        streaming = not (options.dedup_memory_budget or options.sort_output)
+        passcodes = self.metrics.measure("dedup", passcodes, "filter", count_unique=streaming)
+
+        # Filter out previous passwords if enabled
+        if previous_passwords:
+            passcodes = self.metrics.measure("exclusion", self.password_filter.filter_stream(
+                passcodes, previous_passwords), "filter")
+
+        if self._checkpointing:
+            written_count = resume['output']['written_count'] if resume is not None else 0
+            passcodes = self._iter_with_snapshots(passcodes, written_count)
+
+        return passcodes
+
+    @staticmethod
+    def _closing(passcodes, index):
+        """Yield passcodes, closing the exclusion index once they are exhausted, cancelled or dropped"""
+        try:
+            yield from passcodes
+        finally:
+            index.close()
+
+    def estimate(self, options):
+        """Count candidates and output bytes for each enabled stage without generating them
+
+        Counts are taken before deduplication and exclusion, so they are an
+        upper bound on the output; random stage bytes are an expected value.
+        Counts cover all shards of a multi-node run.
+        Returns {'stages': {name: (candidates, bytes)}, 'candidates': n, 'bytes': n}.
+        """
+        self.validate(options)
+        settings = self._generator_settings(options)
+        stages = {}
+
+        if options.include_common:
+            stages["common"] = self._coordinate(CommonGenerator(self.data_loader, **settings), options).estimate()
+        if options.include_dates and options.dates_text.strip():
+            stages["dates"] = DateGenerator(self.data_loader, **settings).estimate(options.dates_text)
+        if options.include_words:
+            stages["words"] = WordGenerator(self.data_loader, **settings).estimate(options.get_words())
+        if options.include_combinations:
+            stages["smart"] = self._coordinate(SmartGenerator(self.data_loader, **settings), options).estimate(
+                options.words_text, options.dates_text)
+        if options.get_masks():
+            mask_gen = MaskGenerator(self.data_loader, options.custom_charsets, **settings)
+            stages["masks"] = mask_gen.estimate(options.get_masks(), options.mask_skip, options.mask_limit)
+        if options.include_random:
+            stages["random"] = RandomGenerator(options.random_alphabet).estimate(
+                options.num_random, options.min_length, options.max_length)
+
+        candidates = sum(count for count, _ in stages.values())
+        byte_count = sum(size for _, size in stages.values())
+        # One delimiter between consecutive passcodes
+        byte_count += max(candidates - 1, 0) * len(options.delimiter.encode('utf-8'))
+
+        return {'stages': stages, 'candidates': candidates, 'bytes': byte_count}
+
+    def _load_previous(self, options):
+        """Load the exclusion set, or open (building if needed) its on-disk index"""
+        # Large text exclusion files are parsed with the same worker count
+        self.password_filter.workers = options.workers
+        if options.use_previous_index or PasswordIndex.is_index_file(options.previous_file):
+            return self.password_filter.open_previous_index(options.previous_file, options.previous_index_path)
+        return self.password_filter.load_previous_passwords(options.previous_file)
+
+    def _deduplicate(self, passcodes, options, seen=None):
+        """Remove duplicates in memory, or out of core when a memory budget is set
+
+        In memory, the set of seen passcodes grows with the output.
+        seen holds passcodes already written by an interrupted run.
+        """
+        if options.dedup_memory_budget:
+            deduplicator = ExternalDeduplicator(options.dedup_memory_budget)
+            deduplicator.set_status_callback(self.status_callback)
+            # Merging sorted runs always produces sorted output
+            return deduplicator.unique_sorted(passcodes)
+
+        if options.sort_output:
+            return iter(sorted(StreamUtils.unique(passcodes)))
+        return StreamUtils.unique(passcodes, seen)
+
+    def _count_unique(self, passcodes):
+        """Count deduplicated passcodes, reporting the measured duplicate ratio once all are through
+
+        Generators avoid most duplicates themselves, so a high ratio points
+        at overlapping inputs (e.g. a word also in the common lists).
+        """
+        for passcode in passcodes:
+            self.unique_count += 1
+            yield passcode
+
+        if self.generated_count:
+            duplicates = self.generated_count - self.unique_count
+            self._update_status(f"Deduplication removed {duplicates:,} of {self.generated_count:,} "
+                                f"candidates ({self.duplicate_ratio:.1%})")
+
+    def save(self, options, base_filename, file_extension):
+        """Run the pipeline and save with splitting, returning the files created
+
+        With a checkpoint path, progress is saved periodically and, if
+        options.resume is set, an interrupted run continues from it.
+        """
+        self.file_manager.set_compression(options.compression, options.compression_level,
+                                          options.split_on_compressed)
+        if not options.checkpoint_path:
+            passcodes = self.iter_passcodes(options)
+            files_created = self.file_manager.save_with_splitting(
+                passcodes, base_filename, options.delimiter, file_extension
+            )
+            self._finish_metrics(options)
+            return files_created
+
+        checkpoint = Checkpoint(options.checkpoint_path)
+        resume = None
+        if options.resume and checkpoint.exists():
+            resume = checkpoint.load()
+            if (resume.get('fingerprint') != options.fingerprint()
+                    or resume.get('output_name') != [base_filename, file_extension]):
+                raise ValueError(f"Checkpoint {options.checkpoint_path} belongs to a run with different options")
+            self.file_manager.restore_output(resume['output'], base_filename, file_extension)
+        elif options.resume:
+            self._update_status("No checkpoint found, starting from the beginning")
+
+        passcodes = self.iter_passcodes(options, resume)
+        last_saved = time.monotonic()
+
+        def save_checkpoint(written_count):
+            nonlocal last_saved
+            snapshot = self._snapshots.pop(written_count, None)
+            if snapshot is None or time.monotonic() - last_saved < options.checkpoint_interval:
+                return
+            position, stage_counts = snapshot
+            checkpoint.save({
+                'fingerprint': options.fingerprint(),
+                'output_name': [base_filename, file_extension],
+                'position': position,
+                'stage_counts': stage_counts,
+                'output': self.file_manager.sync_output()
+            })
+            last_saved = time.monotonic()
+            self._update_status(f"Checkpoint saved after {written_count:,} passcodes")
+
+        self.file_manager.set_batch_callback(save_checkpoint)
+        try:
+            files_created = self.file_manager.save_with_splitting(
+                passcodes, base_filename, options.delimiter, file_extension,
+                resume['output'] if resume is not None else None
+            )
+        finally:
+            self.file_manager.set_batch_callback(None)
+
+        checkpoint.remove()
+        self._finish_metrics(options)
+        return files_created
+
+    def _finish_metrics(self, options):
+        """Report the last stages' metrics and save the requested report and profile"""
+        if not self.metrics.enabled:
+            return
+        self.metrics.finish()
+        if options.metrics_path:
+            self.metrics.save_report(options.metrics_path)
+            self._update_status(f"Stage metrics saved to {options.metrics_path}")
+        if options.profile_stage and options.profile_path:
+            self.metrics.save_profile(options.profile_path)
+            self._update_status(f"Profile of the {options.profile_stage} stage saved to {options.profile_path}")
+
+    def _iter_with_snapshots(self, passcodes, written_count):
+        """Record the generation position after each batch of output passcodes
+
+        The file manager writes in batches of the same size, so once a batch
+        is on disk the snapshot for its last passcode says where to resume.
+        """
+        self._snapshots = {}
+        for batch in StreamUtils.batched(passcodes):
+            written_count += len(batch)
+            # The writer holds at most one batch of lookahead
+            self._snapshots.pop(written_count - 2 * len(batch), None)
+            self._snapshots[written_count] = (self._current_position(), dict(self.stage_counts))
+            yield from batch
+
+    def _current_position(self):
+        """Stage, unit and offset into the unit of the last candidate taken"""
+        return {
+            'stage': self._stage,
+            'unit': self._unit,
+            'offset': self.stage_counts[self._stage] - self._unit_start
+        }
+
+    def _start_unit(self, unit):
+        """Unit callback: note how many candidates the stage had produced when unit began"""
+        # While a resumed generator skips ahead, the units up to the checkpoint's are ignored
+        if self._unit is None or unit > self._unit:
+            self._unit = unit
+            self._unit_start = self.stage_counts[self._stage]
+
+    def write_stream(self, options, stream):
+        """Run the pipeline and write to an open text stream, returning the count"""
+        written_count = 0
+        for passcode, is_last in StreamUtils.mark_last(self.iter_passcodes(options)):
+            stream.write(passcode if is_last else passcode + options.delimiter)
+            written_count += 1
+        self._finish_metrics(options)
+        return written_count
+
+    def _iter_stage(self, name, passcodes, done_message, generator=None):
+        """Count a generator's stream, reporting once it is exhausted
+
+        Generators apply the length bounds themselves, before building strings.
+        generator is the in-process generator whose units locate checkpoints.
+        """
+        position = self._resume_point(name)
+        if position is None:
+            position = {'unit': None, 'offset': 0}
+            self.stage_counts[name] = 0
+        if self._checkpointing:
+            self._stage = name
+            self._unit = position['unit']
+            self._unit_start = self.stage_counts[name] - position['offset']
+            if generator is not None:
+                generator.set_unit_callback(self._start_unit)
+
+        # Counting and cancel checks run inside the measured stream, so they are charged to the stage
+        yield from self.metrics.measure(name, self._counted(name, StreamUtils.cancellable(passcodes, self.cancel_event)))
+
+        self.metrics.finish_stage(name)
+        self._update_status(done_message.format(count=self.stage_counts[name]))
+
+    def _counted(self, name, passcodes):
+        """Count the candidates a stage hands on in stage_counts"""
+        for passcode in passcodes:
+            self.stage_counts[name] += 1
+            yield passcode
+
+    def _resume_point(self, name):
+        """Return the checkpoint position if a resumed run stopped in this stage"""
+        if self._resume_position is not None and self._resume_position['stage'] == name:
+            return self._resume_position
+        return None
+
+    def _stage_pending(self, name):
+        """Check whether a stage still has work, i.e. a resumed run did not finish it"""
+        if self._resume_position is None:
+            return True
+        return self.STAGES.index(name) >= self.STAGES.index(self._resume_position['stage'])
+
+    def _generator_settings(self, options):
+        """Keyword arguments shared by every data-driven generator"""
+        return {
+            'use_case_variations': options.use_case_variations,
+            'case_mode': options.case_mode,
+            'min_len': options.min_length,
+            'max_len': options.max_length,
+            'leet_table': options.leet_table,
+            'leet_max_substitutions': options.leet_max_substitutions
+        }
+
+    def _coordinate(self, generator, options):
+        """Skip the templates a generator shares with another enabled generator over the same inputs
+
+        The word stage expands every common word and user word with every
+        pattern, and the date stage every date with the first 50 common
+        passwords, so the common and smart stages leave those candidates to
+        them instead of producing them twice.
+        """
+        if options.include_words:
+            if isinstance(generator, CommonGenerator):
+                generator.set_covered_section("common_word_patterns", "word_patterns")
+            elif isinstance(generator, SmartGenerator):
+                generator.set_covered_section("smart_word_patterns", "word_patterns")
+        if options.include_dates and options.dates_text.strip() and isinstance(generator, SmartGenerator):
+            generator.set_covered_section("smart_date_commons", "date_commons")
+        return generator
+
+    def _generator_stream(self, generator, options, *args):
+        """Return a generator's candidates, sharded across processes if requested"""
+        if options.workers <= 1:
+            passcodes = generator.iter_generate(*args)
+            hash_shard = self._hash_shard(options)
+            if hash_shard is not None:
+                passcodes = StreamUtils.hash_shard(passcodes, *hash_shard)
+            return passcodes
+        return self._iter_parallel(generator, options, args)
+
+    @staticmethod
+    def _hash_shard(options):
+        """Return (shard_index, shard_count) if this node keeps candidates by hash, else None"""
+        if options.shard_count > 1 and options.shard_by == "hash":
+            return options.shard_index, options.shard_count
+        return None
+
+    def _iter_generator(self, name, generator, options, args, done_message):
+        """Run one generator as a stage, continuing where a resumed run stopped
+
+        In-process generators skip the units before the checkpoint and then
+        the candidates already taken from its unit (masks jump to the unit's
+        keyspace index, so at most one unit is replayed); sharded runs skip
+        the candidates already taken from the merged stream.
+        """
+        in_process = options.workers <= 1
+        if options.shard_count > 1 and options.shard_by == "units":
+            generator.set_shard(options.shard_index, options.shard_count)
+        position = self._resume_point(name)
+        if position is not None and in_process and position['unit'] is not None:
+            generator.set_resume_unit(position['unit'])
+
+        passcodes = self._generator_stream(generator, options, *args)
+        if position is not None:
+            passcodes = islice(passcodes, position['offset'], None)
+        return self._iter_stage(name, passcodes, done_message, generator if in_process else None)
+
+    def _iter_parallel(self, generator, options, args):
+        """Run one shard per worker process and merge their temp files in shard order"""
+        shard_count = options.workers
+
+        with tempfile.TemporaryDirectory(prefix="passcodes_") as temp_dir:
+            tasks = [
+                (generator, args, shard_index, shard_count, self._hash_shard(options), temp_dir)
+                for shard_index in range(shard_count)
+            ]
+
+            pool = multiprocessing.Pool(processes=options.workers)
+            try:
+                results = pool.imap(_run_generator_shard, tasks)
+                for shard_index in range(shard_count):
+                    # Wait in short slices so a cancel does not sit behind a long shard
+                    while True:
+                        self._check_cancelled()
+                        try:
+                            path, count, (hits, misses) = results.next(timeout=self.POLL_INTERVAL_SECONDS)
+                            break
+                        except multiprocessing.TimeoutError:
+                            pass
+
+                    self._worker_case_cache['hits'] += hits
+                    self._worker_case_cache['misses'] += misses
+                    self._update_status(f"Merging shard {shard_index + 1} of {shard_count} ({count:,} candidates)...")
+                    with open(path, 'r', encoding='utf-8', newline='\n') as f:
+                        for line in f:
+                            yield line.rstrip("\n")
+                    os.remove(path)
+
+                pool.close()
+            finally:
+                # Stops any still-running shards on cancel or error; a no-op once all are done
+                pool.terminate()
+                pool.join()
+
+    def _iter_all_passcodes(self, options):
+        """Lazily yield length-filtered passcodes from every enabled generator"""
+        yield from self._iter_generator_stages(options)
+        self._report_case_cache()
+
+    def _report_case_cache(self):
+        """Record and report case variation cache savings for this run, worker processes included"""
+        cache_info = TextUtils.case_cache_info()
+        self.case_cache_stats = {
+            'hits': cache_info.hits - self._case_cache_start.hits + self._worker_case_cache['hits'],
+            'misses': cache_info.misses - self._case_cache_start.misses + self._worker_case_cache['misses']
+        }
+        self._update_status(f"Case variation cache: {self.case_cache_stats['hits']:,} hits, "
+                            f"{self.case_cache_stats['misses']:,} misses")
+
+    def _iter_generator_stages(self, options):
+        """Yield each enabled generator's stage in turn"""
+        settings = self._generator_settings(options)
+
+        # Generate common passwords
+        if options.include_common and self._stage_pending("common"):
+            self._update_status("Generating common passwords and patterns...")
+
+            common_gen = self._coordinate(CommonGenerator(self.data_loader, **settings), options)
+            yield from self._iter_generator("common", common_gen, options, (),
+                                            "Generated {count:,} common password variations")
+
+        # Generate date-based passcodes
+        if options.include_dates and options.dates_text.strip() and self._stage_pending("dates"):
+            self._update_status("Generating date-based passcodes...")
+
+            date_gen = DateGenerator(self.data_loader, **settings)
+            yield from self._iter_generator("dates", date_gen, options, (options.dates_text,),
+                                            "Generated {count:,} date-based passcodes")
+
+        # Generate word-based passcodes
+        if options.include_words and self._stage_pending("words"):
+            self._update_status("Generating word-based passcodes...")
+
+            word_gen = WordGenerator(self.data_loader, **settings)
+            word_gen.set_status_callback(self.status_callback)
+            yield from self._iter_generator("words", word_gen, options, (options.get_words(),),
+                                            "Generated {count:,} word-based passcodes")
+
+        # Generate smart combinations
+        if options.include_combinations and self._stage_pending("smart"):
+            self._update_status("Generating smart combinations...")
+
+            smart_gen = self._coordinate(SmartGenerator(self.data_loader, **settings), options)
+            yield from self._iter_generator("smart", smart_gen, options, (options.words_text, options.dates_text),
+                                            "Generated {count:,} smart combinations")
+
+        # Generate mask candidates
+        if options.get_masks() and self._stage_pending("masks"):
+            self._update_status("Generating mask candidates...")
+
+            mask_gen = MaskGenerator(self.data_loader, options.custom_charsets, **settings)
+            yield from self._iter_generator("masks", mask_gen, options,
+                                            (options.get_masks(), options.mask_skip, options.mask_limit),
+                                            "Generated {count:,} mask candidates")
+
+        # Generate random passcodes
+        if options.include_random and self._stage_pending("random"):
+            self._update_status("Generating random passcodes...")
+
+            # Each node draws its share; random candidates are not replayed, so a resumed run only draws the rest
+            random_count = (options.num_random * (options.shard_index + 1) // options.shard_count
+                            - options.num_random * options.shard_index // options.shard_count)
+            position = self._resume_point("random")
+            if position is not None:
+                random_count -= position['offset']
+
+            random_gen = RandomGenerator(options.random_alphabet)
+            random_passcodes = random_gen.iter_generate(random_count, options.min_length, options.max_length)
+            yield from self._iter_stage("random", random_passcodes,
+                                        "Generated {count:,} random passcodes")
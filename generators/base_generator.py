@@ -2,25 +2,192 @@
 Base generator class with common functionality
 """
 
+import sys
+
 from utils.text_utils import TextUtils
+from utils.stream_utils import StreamUtils
+from utils.rule_engine import ManglingRules
+from utils.leet_engine import LeetExpander
 
 class BaseGenerator:
-    def __init__(self, data_loader=None, use_case_variations=False):
+    def __init__(self, data_loader=None, use_case_variations=False, case_mode=TextUtils.CASE_MODE_COMPAT,
+                 min_len=None, max_len=None, leet_table=None,
+                 leet_max_substitutions=LeetExpander.DEFAULT_MAX_SUBSTITUTIONS):
         self.data_loader = data_loader
         self.use_case_variations = use_case_variations
+        self.case_mode = case_mode
+        self.leet = LeetExpander(leet_table, leet_max_substitutions)
+
+        # Length bounds are checked before a candidate string is built
+        self.min_len = min_len if min_len is not None else 0
+        self.max_len = max_len if max_len is not None else sys.maxsize
         self.special_chars = [
             "!", "@", "#", "$", "%", "^", "&", "*", "(", ")", "-", "_", "=", "+",
             "[", "]", "{", "}", "|", "\\", ":", ";", "\"", "'", "<", ">", ",", ".",
             "?", "/", "~", "`"
         ]
 
+        # Sharding: the outer loops are numbered into work units and this
+        # generator only expands units where unit % shard_count == shard_index
+        self.shard_index = 0
+        self.shard_count = 1
+        self._next_unit = 0
+        self._resume_unit = 0
+        self.unit_callback = None
+
+        # Rule sections whose templates another generator already expands for the same inputs
+        self.covered_sections = {}
+
+    def set_shard(self, shard_index, shard_count):
+        """Restrict generation to one deterministic slice of the outer loops"""
+        if shard_count < 1 or not 0 <= shard_index < shard_count:
+            raise ValueError(f"Invalid shard {shard_index} of {shard_count}")
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+    def split_shard(self, shard_index, shard_count):
+        """Narrow the current shard to one of shard_count sub-shards, e.g. one worker of a node's shard"""
+        self.set_shard(self.shard_index + self.shard_count * shard_index, self.shard_count * shard_count)
+
+    def set_resume_unit(self, unit):
+        """Skip every outer-loop unit before unit, to resume an interrupted run"""
+        self._resume_unit = unit
+
+    def set_unit_callback(self, callback):
+        """Call callback(unit) as each outer-loop unit is numbered
+
+        Candidates are only yielded after the unit they belong to, so the
+        candidates taken before the call all come from earlier units.
+        """
+        self.unit_callback = callback
+
+    def _begin_units(self):
+        """Restart unit numbering at the beginning of a generation"""
+        self._next_unit = 0
+
+    def _claim_unit(self):
+        """Number the next outer-loop unit and report whether this shard owns it"""
+        unit = self._next_unit
+        self._next_unit += 1
+        if self.unit_callback is not None:
+            self.unit_callback(unit)
+        return unit >= self._resume_unit and unit % self.shard_count == self.shard_index
+
+    def _fits(self, length):
+        """Check whether a candidate of this length is within the bounds"""
+        return self.min_len <= length <= self.max_len
+
+    def _any_fits(self, shortest, longest):
+        """Check whether any length from shortest to longest is within the bounds"""
+        return shortest <= self.max_len and longest >= self.min_len
+
+    @staticmethod
+    def _length_range(items):
+        """Return the (shortest, longest) length of a non-empty collection of strings"""
+        lengths = [len(item) for item in items]
+        return min(lengths), max(lengths)
+
+    @staticmethod
+    def _text_size(*parts):
+        """Return the (length, UTF-8 byte length) of the concatenated parts"""
+        text = ''.join(parts)
+        return len(text), len(text.encode('utf-8'))
+
+    def get_variation_sizes(self, word):
+        """Count get_case_variations(word) by (length, byte length) without building them"""
+        mode = self.case_mode if self.use_case_variations else TextUtils.CASE_MODE_BASIC
+        return TextUtils.case_variation_sizes(word, mode)
+
+    def _begin_estimate(self):
+        """Reset the running candidate and byte totals of an estimate"""
+        self._estimate_count = 0
+        self._estimate_bytes = 0
+
+    def _tally(self, sizes, additions=((0, 0),)):
+        """Add the candidates built by appending each addition's (length, bytes) to every size
+
+        Only candidates within the length bounds are counted, as in generation.
+        """
+        for (length, byte_length), count in sizes.items():
+            for extra_length, extra_bytes in additions:
+                if self._fits(length + extra_length):
+                    self._estimate_count += count
+                    self._estimate_bytes += count * (byte_length + extra_bytes)
+
+    def _tally_rules(self, sizes, additions, weight=1):
+        """Add the candidates a rule section builds from words counted in sizes
+
+        additions come from RuleSet.size_additions; weight multiplies every count.
+        """
+        for copies, extra_length, extra_bytes in additions:
+            for (length, byte_length), count in sizes.items():
+                if self._fits(copies * length + extra_length):
+                    self._estimate_count += weight * count
+                    self._estimate_bytes += weight * count * (copies * byte_length + extra_bytes)
+
+    def set_covered_section(self, section, covering_section):
+        """Skip the templates of section that covering_section has
+
+        Only valid when another generator in the same run expands
+        covering_section over the same words and values, so the skipped
+        candidates are still produced exactly once.
+        """
+        self.covered_sections[section] = covering_section
+
+    def get_rules(self, section):
+        """Return a compiled mangling rule section from the data loader (or the bundled file)"""
+        rules = getattr(self.data_loader, 'mangling_rules', None) or ManglingRules.default()
+        covering_section = self.covered_sections.get(section)
+        if covering_section is not None:
+            return rules.section(section).without(rules.section(covering_section))
+        return rules.section(section)
+
+    def _expand_rules(self, bound, words):
+        """Apply bound rules to each word in turn, within this generator's length bounds"""
+        return bound.expand_all(words, self.min_len, self.max_len)
+
+    def _estimate_result(self):
+        """Return the (candidates, bytes) totals of an estimate"""
+        return self._estimate_count, self._estimate_bytes
+
     def get_case_variations(self, word):
-        """Get case variations based on settings"""
+        """Get case variations based on settings, memoized across generators"""
         if self.use_case_variations:
-            return TextUtils.generate_all_case_variations(word)
+            return TextUtils.cached_case_variations(word, self.case_mode)
         else:
-            return TextUtils.generate_basic_case_variations(word)
+            return TextUtils.cached_case_variations(word, TextUtils.CASE_MODE_BASIC)
+
+    def iter_leet_variations(self, word):
+        """Yield the case variations of each leetspeak variant of word within the length bounds
+
+        Each variant is seldom seen again, so they bypass the shared case cache.
+        """
+        mode = self.case_mode if self.use_case_variations else TextUtils.CASE_MODE_BASIC
+        for leet_word in self.leet.expand(word):
+            for variation in TextUtils.case_variations(leet_word, mode):
+                if self._fits(len(variation)):
+                    yield variation
+
+    def tally_leet_variations(self, word):
+        """Count iter_leet_variations(word) into the running estimate"""
+        for leet_word in self.leet.expand(word):
+            self._tally(self.get_variation_sizes(leet_word))
 
     def generate(self, *args, **kwargs):
-        """Override in subclasses"""
-        raise NotImplementedError("Subclasses must implement generate method")
+        """Generate all candidates as a single list"""
+        return list(self.iter_generate(*args, **kwargs))
+
+    def generate_batches(self, *args, batch_size=StreamUtils.DEFAULT_BATCH_SIZE, **kwargs):
+        """Yield candidates in lists of at most batch_size items"""
+        return StreamUtils.batched(self.iter_generate(*args, **kwargs), batch_size)
+
+    def iter_generate(self, *args, **kwargs):
+        """Override in subclasses to yield candidates lazily"""
+        raise NotImplementedError("Subclasses must implement iter_generate method")
+
+    def estimate(self, *args, **kwargs):
+        """Override in subclasses to count (candidates, bytes) without generating them
+
+        Counts are exact before deduplication, so they bound the unique output.
+        """
+        raise NotImplementedError("Subclasses must implement estimate method")
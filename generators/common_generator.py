@@ -3,69 +3,108 @@ Common passwords and patterns generator
 """
 
 from .base_generator import BaseGenerator
-from utils.text_utils import TextUtils
 
 class CommonGenerator(BaseGenerator):
-    def generate(self):
+    def iter_generate(self):
         """Generate variations of common passwords"""
-        combinations = []
 
         if not self.data_loader:
-            return combinations
+            return
+
+        self._begin_units()
+        password_pattern_rules = self.get_rules("common_password_patterns")
+        password_special_rules = self.get_rules("common_password_specials")
+        word_pattern_rules = self.get_rules("common_word_patterns")
 
         # Add base common passwords with case variations
         for password in self.data_loader.common_passwords:
+            if not self._claim_unit():
+                continue
             password_variations = self.get_case_variations(password)
-            combinations.extend(password_variations)
+            for password_var in password_variations:
+                if self._fits(len(password_var)):
+                    yield password_var
 
         # Add common passwords with patterns
         for password in self.data_loader.common_passwords[:50]:  # Limit to prevent explosion
+            if not self._claim_unit():
+                continue
             password_variations = self.get_case_variations(password)
+            shortest, longest = self._length_range(password_variations)
 
             for pattern in self.data_loader.common_patterns[:30]:
-                for password_var in password_variations:
-                    combinations.extend([
-                        password_var + pattern,
-                        pattern + password_var,
-                        password_var + pattern + "!",
-                        password_var + "!" + pattern,
-                        password_var + "_" + pattern,
-                        pattern + "_" + password_var,
-                        password_var + "." + pattern,
-                        pattern + "." + password_var
-                    ])
+                if not self._any_fits(*password_pattern_rules.length_range(
+                        word=(shortest, longest), pattern=(len(pattern), len(pattern)))):
+                    continue
+                rules = password_pattern_rules.bind(pattern=pattern)
+                yield from self._expand_rules(rules, password_variations)
 
         # Add common passwords with special characters
         for password in self.data_loader.common_passwords[:30]:  # Further limit
+            if not self._claim_unit():
+                continue
             password_variations = self.get_case_variations(password)
+            shortest, longest = self._length_range(password_variations)
 
             for char in self.special_chars[:10]:
-                for password_var in password_variations:
-                    combinations.extend([
-                        password_var + char,
-                        char + password_var,
-                        password_var + char + char,
-                        char + password_var + char
-                    ])
+                if not self._any_fits(*password_special_rules.length_range(
+                        word=(shortest, longest), char=(len(char), len(char)))):
+                    continue
+                rules = password_special_rules.bind(char=char)
+                yield from self._expand_rules(rules, password_variations)
 
         # Add common words with patterns
         for word in self.data_loader.common_words[:50]:  # Limit common words
+            if not self._claim_unit():
+                continue
             word_variations = self.get_case_variations(word)
+            shortest, longest = self._length_range(word_variations)
 
             for pattern in self.data_loader.common_patterns[:20]:
-                for word_var in word_variations:
-                    combinations.extend([
-                        word_var + pattern,
-                        pattern + word_var,
-                        word_var + pattern + "!",
-                        pattern + word_var + "!"
-                    ])
+                if not self._any_fits(*word_pattern_rules.length_range(
+                        word=(shortest, longest), pattern=(len(pattern), len(pattern)))):
+                    continue
+                rules = word_pattern_rules.bind(pattern=pattern)
+                yield from self._expand_rules(rules, word_variations)
 
         # Add leetspeak versions
         for password in self.data_loader.common_passwords[:20]:
-            leet_password = TextUtils.to_leetspeak(password)
-            if leet_password != password:
-                leet_variations = self.get_case_variations(leet_password)
-                combinations.extend(leet_variations)
+            if not self._claim_unit():
+                continue
+            yield from self.iter_leet_variations(password)
+
+    def estimate(self):
+        """Count the candidates and bytes iter_generate would produce"""
+        self._begin_estimate()
+        if not self.data_loader:
+            return self._estimate_result()
+
+        for password in self.data_loader.common_passwords:
+            self._tally(self.get_variation_sizes(password))
+
+        password_pattern_rules = self.get_rules("common_password_patterns")
+        password_special_rules = self.get_rules("common_password_specials")
+        word_pattern_rules = self.get_rules("common_word_patterns")
+
+        for password in self.data_loader.common_passwords[:50]:
+            password_sizes = self.get_variation_sizes(password)
+            for pattern in self.data_loader.common_patterns[:30]:
+                self._tally_rules(password_sizes, password_pattern_rules.size_additions(
+                    pattern=self._text_size(pattern)))
+
+        for password in self.data_loader.common_passwords[:30]:
+            password_sizes = self.get_variation_sizes(password)
+            for char in self.special_chars[:10]:
+                self._tally_rules(password_sizes, password_special_rules.size_additions(
+                    char=self._text_size(char)))
+
+        for word in self.data_loader.common_words[:50]:
+            word_sizes = self.get_variation_sizes(word)
+            for pattern in self.data_loader.common_patterns[:20]:
+                self._tally_rules(word_sizes, word_pattern_rules.size_additions(
+                    pattern=self._text_size(pattern)))
+
+        for password in self.data_loader.common_passwords[:20]:
+            self.tally_leet_variations(password)
 
-        return combinations
+        return self._estimate_result()
@@ -6,60 +6,90 @@ from .base_generator import BaseGenerator
 from utils.text_utils import TextUtils
 
 class DateGenerator(BaseGenerator):
-    def generate(self, date_text):
+    def iter_generate(self, date_text):
         """Generate date-based passcode combinations"""
-        combinations = []
 
         if not date_text.strip():
-            return combinations
+            return
 
+        self._begin_units()
         dates = TextUtils.parse_dates(date_text)
+        affix_rules = self.get_rules("date_affixes").bind()
+        common_rules = self.get_rules("date_commons")
+        variant_rules = self.get_rules("date_variants").bind()
 
         for date in dates:
-            combinations.append(date)
+            # Each date's fixed variants form units, each common password another
+            owns_date = self._claim_unit()
+            if owns_date and self._fits(len(date)):
+                yield date
 
             # Add with common prefixes/suffixes
-            prefixes = ['', 'pass', 'pwd', 'code', 'user', 'admin', 'login', 'key', 'secret']
-            suffixes = ['', '!', '@', '#', '$', '*', '123', 'abc', '321', '456', '789', 'xyz']
-
-            for prefix in prefixes:
-                for suffix in suffixes:
-                    if prefix or suffix:
-                        combo = prefix + date + suffix
-                        combinations.append(combo)
+            if owns_date:
+                yield from self._expand_rules(affix_rules, [date])
 
             # Combine with common passwords (with case variations if enabled)
             if self.data_loader:
+                rules = common_rules.bind(date=date)
                 for common in self.data_loader.common_passwords[:50]:  # Use top 50 common passwords
+                    if not self._claim_unit():
+                        continue
                     common_variations = self.get_case_variations(common)
 
-                    for common_var in common_variations:
-                        combinations.extend([
-                            common_var + date,
-                            date + common_var,
-                            common_var + date + "!",
-                            date + common_var + "!",
-                            common_var + "_" + date,
-                            date + "_" + common_var
-                        ])
+                    yield from self._expand_rules(rules, common_variations)
+
+            # The date's remaining variants form one more unit
+            if not self._claim_unit():
+                continue
 
             # Add reversed dates
-            reversed_date = date[::-1]
-            combinations.append(reversed_date)
+            yield from self._expand_rules(variant_rules, [date])
 
             # Add date with special characters between digits
             if len(date) >= 4:
                 for char in ['-', '_', '.', '/']:
                     if len(date) == 8:  # DDMMYYYY or MMDDYYYY
-                        combinations.extend([
-                            date[:2] + char + date[2:4] + char + date[4:],
-                            date[:4] + char + date[4:],
-                            date[4:] + char + date[:4]
-                        ])
+                        if self._fits(len(date) + 2 * len(char)):
+                            yield date[:2] + char + date[2:4] + char + date[4:]
+                        if self._fits(len(date) + len(char)):
+                            yield from (
+                                date[:4] + char + date[4:],
+                                date[4:] + char + date[:4]
+                            )
                     elif len(date) == 6:  # DDMMYY or MMDDYY
-                        combinations.extend([
-                            date[:2] + char + date[2:4] + char + date[4:],
-                            date[:4] + char + date[4:]
-                        ])
+                        if self._fits(len(date) + 2 * len(char)):
+                            yield date[:2] + char + date[2:4] + char + date[4:]
+                        if self._fits(len(date) + len(char)):
+                            yield date[:4] + char + date[4:]
+
+    def estimate(self, date_text):
+        """Count the candidates and bytes iter_generate would produce"""
+        self._begin_estimate()
+        if not date_text.strip():
+            return self._estimate_result()
+
+        affix_rules = self.get_rules("date_affixes")
+        common_rules = self.get_rules("date_commons")
+        variant_rules = self.get_rules("date_variants")
+        no_addition = {(0, 0): 1}
+
+        for date in TextUtils.parse_dates(date_text):
+            date_sizes = TextUtils.count_sizes([date])
+            self._tally(date_sizes)
+            self._tally_rules(date_sizes, affix_rules.size_additions())
+
+            if self.data_loader:
+                for common in self.data_loader.common_passwords[:50]:
+                    self._tally_rules(self.get_variation_sizes(common), common_rules.size_additions(
+                        date=self._text_size(date)))
+
+            self._tally_rules(date_sizes, variant_rules.size_additions())
+
+            if len(date) in (6, 8):
+                for char in ['-', '_', '.', '/']:
+                    separated = [self._text_size(date, char, char), self._text_size(date, char)]
+                    if len(date) == 8:
+                        separated.append(self._text_size(date, char))
+                    self._tally(no_addition, separated)
 
-        return combinations
+        return self._estimate_result()
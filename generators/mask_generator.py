@@ -0,0 +1,280 @@
+"""
+Mask-based passcode generator with random access into its keyspace
+"""
+
+import string
+
+from .base_generator import BaseGenerator
+from utils.text_utils import TextUtils
+from utils.wordlist import MappedWordlist
+
+class MaskGenerator(BaseGenerator):
+    """Expand masks like ?u?l?l?l?d?d?d?d or admin?d?d?s
+
+    Each ?x token is one position drawn from a charset; other characters
+    are literal. Built-in charsets:
+        ?l lowercase  ?u uppercase  ?d digits  ?s special characters
+        ?a all of ?l?u?d?s  ?? a literal '?'
+        ?w common words  ?p common passwords  ?t common patterns (DataLoader)
+        ?1 - ?4 custom charsets, defined with the same tokens
+    The keyspace of a list of masks is numbered in order, with the last
+    position changing fastest, so candidate(i) costs O(length) and
+    skip/limit or sharding never replays the enumeration. Memory-mapped
+    custom wordlists are indexed in place rather than copied, so repeated
+    entries in them are not merged (deduplication drops the repeats).
+    """
+
+    CUSTOM_CHARSET_KEYS = "1234"
+    MERGED_TAIL_SIZE = 4096  # Trailing positions are pre-joined up to this many strings
+    UNIT_SIZE = 1 << 20  # Keyspace indices per checkpoint unit
+
+    def __init__(self, data_loader=None, custom_charsets=None, **kwargs):
+        super().__init__(data_loader, **kwargs)
+        self._compiled = {}
+        self._length_ranges = {}
+        self.custom_charsets = {}
+        for key, definition in (custom_charsets or {}).items():
+            key = str(key)
+            if key not in self.CUSTOM_CHARSET_KEYS:
+                raise ValueError(f"Custom charsets are numbered 1-4, got '{key}'")
+            self.custom_charsets[key] = self._expand_charset(definition)
+
+    def _named_charset(self, name):
+        """Return the items of a built-in or data list charset"""
+        if name == "l":
+            return tuple(string.ascii_lowercase)
+        elif name == "u":
+            return tuple(string.ascii_uppercase)
+        elif name == "d":
+            return tuple(string.digits)
+        elif name == "s":
+            return tuple(self.special_chars)
+        elif name == "a":
+            return tuple(string.ascii_letters + string.digits) + tuple(self.special_chars)
+        elif name == "?":
+            return ("?",)
+        elif name in ("w", "p", "t"):
+            if not self.data_loader:
+                return ()
+            # Mapped wordlists are returned as they are, never loaded into memory
+            return {
+                "w": self.data_loader.common_words,
+                "p": self.data_loader.common_passwords,
+                "t": self.data_loader.common_patterns
+            }[name]
+        raise ValueError(f"Unknown charset '?{name}'")
+
+    def _expand_charset(self, definition):
+        """Expand a custom charset definition such as 'abc?d' into unique items"""
+        items = []
+        chars = iter(definition)
+        for char in chars:
+            if char == "?":
+                name = next(chars, None)
+                if name is None:
+                    raise ValueError(f"Charset '{definition}' ends with a lone '?'")
+                items.extend(self._named_charset(name))
+            else:
+                items.append(char)
+        return tuple(dict.fromkeys(items))
+
+    def compile_mask(self, mask):
+        """Parse a mask into a tuple of positions, each a tuple of strings"""
+        positions = self._compiled.get(mask)
+        if positions is not None:
+            return positions
+
+        positions = []
+        chars = iter(mask)
+        for char in chars:
+            if char != "?":
+                positions.append((char,))
+                continue
+
+            name = next(chars, None)
+            if name is None:
+                raise ValueError(f"Mask '{mask}' ends with a lone '?'")
+            if name in self.CUSTOM_CHARSET_KEYS:
+                if name not in self.custom_charsets:
+                    raise ValueError(f"Mask '{mask}' uses undefined custom charset ?{name}")
+                positions.append(self.custom_charsets[name])
+            else:
+                items = self._named_charset(name)
+                positions.append(items if isinstance(items, MappedWordlist) else tuple(dict.fromkeys(items)))
+
+        positions = tuple(positions)
+        self._compiled[mask] = positions
+        return positions
+
+    @staticmethod
+    def _as_list(masks):
+        """Accept a single mask or a list of masks"""
+        return [masks] if isinstance(masks, str) else list(masks)
+
+    @staticmethod
+    def _positions_keyspace(positions):
+        """Number of candidates a compiled mask expands to"""
+        size = 1
+        for items in positions:
+            size *= len(items)
+        return size
+
+    def keyspace(self, masks):
+        """Total number of candidates across the masks, before length bounds"""
+        return sum(self._positions_keyspace(self.compile_mask(mask)) for mask in self._as_list(masks))
+
+    def candidate(self, masks, index):
+        """Return candidate number index of the masks' keyspace in O(length)"""
+        if index < 0:
+            raise IndexError("Mask candidate index out of range")
+
+        for mask in self._as_list(masks):
+            positions = self.compile_mask(mask)
+            size = self._positions_keyspace(positions)
+            if index < size:
+                parts = []
+                for items in reversed(positions):
+                    index, digit = divmod(index, len(items))
+                    parts.append(items[digit])
+                return ''.join(reversed(parts))
+            index -= size
+
+        raise IndexError("Mask candidate index out of range")
+
+    def _index_range(self, total, skip, limit):
+        """Slice [skip, skip + limit) of the keyspace, then this shard's contiguous part of it"""
+        start = min(skip, total)
+        end = total if limit is None else min(total, start + limit)
+        span = end - start
+        return (start + span * self.shard_index // self.shard_count,
+                start + span * (self.shard_index + 1) // self.shard_count)
+
+    def iter_generate(self, masks, skip=0, limit=None):
+        """Generate the masks' candidates, starting at index skip and stopping after limit
+
+        Every UNIT_SIZE keyspace indices form one unit, so a resumed run
+        jumps straight to its unit instead of replaying the candidates before it.
+        """
+        masks = self._as_list(masks)
+        start, end = self._index_range(self.keyspace(masks), skip, limit)
+        start = max(start, min(self._resume_unit * self.UNIT_SIZE, end))
+
+        while start < end:
+            unit = start // self.UNIT_SIZE
+            if self.unit_callback is not None:
+                self.unit_callback(unit)
+            unit_end = min((unit + 1) * self.UNIT_SIZE, end)
+            yield from self._iter_range(masks, start, unit_end)
+            start = unit_end
+
+    def _iter_range(self, masks, start, end):
+        """Yield the candidates with keyspace indices start..end-1 within the length bounds"""
+        offset = 0
+        for mask in masks:
+            positions = self.compile_mask(mask)
+            size = self._positions_keyspace(positions)
+            low, high = max(start - offset, 0), min(end - offset, size)
+            offset += size
+            if low >= high:
+                continue
+
+            shortest, longest = self._mask_length_range(mask)
+            if not self._any_fits(shortest, longest):
+                continue
+
+            candidates = self._iter_positions(self._merge_tail(positions), low, high)
+            if self._fits(shortest) and self._fits(longest):
+                yield from candidates
+            else:
+                for candidate in candidates:
+                    if self._fits(len(candidate)):
+                        yield candidate
+
+    def _mask_length_range(self, mask):
+        """Shortest and longest candidate of a mask, computed once since wordlist positions can be huge"""
+        length_range = self._length_ranges.get(mask)
+        if length_range is None:
+            shortest = longest = 0
+            for items in self.compile_mask(mask):
+                low, high = items.length_range() if isinstance(items, MappedWordlist) else self._length_range(items)
+                shortest += low
+                longest += high
+            length_range = self._length_ranges[mask] = (shortest, longest)
+        return length_range
+
+    def _merge_tail(self, positions):
+        """Pre-join small trailing positions so most candidates come from one list comprehension
+
+        Merging keeps the numbering, since the joined position enumerates
+        in the same last-changes-fastest order.
+        """
+        positions = list(positions)
+        while (len(positions) > 1
+               and len(positions[-1]) * len(positions[-2]) <= self.MERGED_TAIL_SIZE):
+            last = positions.pop()
+            previous = positions.pop()
+            positions.append(tuple(first + second for first in previous for second in last))
+        return positions
+
+    @staticmethod
+    def _iter_positions(positions, low, high):
+        """Yield candidates low..high-1 of a mask, odometer-style"""
+        if not positions:
+            yield ""
+            return
+
+        *prefix_positions, last = positions
+        prefix_index, last_index = divmod(low, len(last))
+
+        # Odometer digits for the prefix positions, last one changing fastest
+        digits = []
+        for items in reversed(prefix_positions):
+            prefix_index, digit = divmod(prefix_index, len(items))
+            digits.append(digit)
+        digits.reverse()
+
+        remaining = high - low
+        while remaining > 0:
+            prefix = ''.join(items[digit] for items, digit in zip(prefix_positions, digits))
+            block = last[last_index:last_index + remaining]
+            yield from [prefix + item for item in block]
+            remaining -= len(block)
+            last_index = 0
+
+            for position in reversed(range(len(digits))):
+                digits[position] += 1
+                if digits[position] < len(prefix_positions[position]):
+                    break
+                digits[position] = 0
+
+    def estimate(self, masks, skip=0, limit=None):
+        """Count the candidates and bytes iter_generate would produce
+
+        Exact for whole masks; a mask cut by skip/limit is scaled by the
+        fraction of it that is generated.
+        """
+        self._begin_estimate()
+        masks = self._as_list(masks)
+        start, end = self._index_range(self.keyspace(masks), skip, limit)
+
+        offset = 0
+        for mask in masks:
+            positions = self.compile_mask(mask)
+            size = self._positions_keyspace(positions)
+            low, high = max(start - offset, 0), min(end - offset, size)
+            offset += size
+            if low >= high:
+                continue
+
+            sizes = {(0, 0): 1}
+            for items in positions:
+                sizes = TextUtils.combine_sizes(sizes, TextUtils.count_sizes(items))
+
+            count, byte_count = self._estimate_result()
+            self._tally(sizes)
+            if high - low < size:
+                # Only part of this mask is generated
+                self._estimate_count = count + (self._estimate_count - count) * (high - low) // size
+                self._estimate_bytes = byte_count + (self._estimate_bytes - byte_count) * (high - low) // size
+
+        return self._estimate_result()
@@ -2,22 +2,130 @@
 Random passcode generator
 """
 
+import os
 import string
-import random
+from itertools import accumulate
+
 from .base_generator import BaseGenerator
+from utils.stream_utils import StreamUtils
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the bytes.translate path needs only the stdlib
+    np = None
 
 class RandomGenerator(BaseGenerator):
-    def __init__(self):
+    DEFAULT_ALPHABET = string.ascii_letters + string.digits
+    MAX_ALPHABET_SIZE = 256  # One random byte is drawn per character
+
+    def __init__(self, alphabet=None, use_numpy=True):
         super().__init__()
+        alphabet = ''.join(dict.fromkeys(alphabet or self.DEFAULT_ALPHABET))
+        if len(alphabet) > self.MAX_ALPHABET_SIZE:
+            raise ValueError(f"Random alphabet can have at most {self.MAX_ALPHABET_SIZE} characters")
+
+        self.alphabet = alphabet
+        self.use_numpy = use_numpy and np is not None
+
+        # Bytes at or above the limit are rejected so every character is equally likely
+        size = len(alphabet)
+        self._limit = 256 - 256 % size
+        self._rejected = bytes(range(self._limit, 256))
+
+        # Accepted bytes map straight to ASCII characters, or to alphabet indices otherwise
+        self._ascii = all(ord(char) < 128 for char in alphabet)
+        if self._ascii:
+            self._table = bytes(ord(alphabet[b % size]) for b in range(256))
+        else:
+            self._table = bytes(b % size for b in range(256))
+            self._char_map = {i: char for i, char in enumerate(alphabet)}
+
+    def iter_generate(self, count, min_len, max_len):
+        """Generate random passcodes from the alphabet"""
+        for batch in self.generate_batches(count, min_len, max_len):
+            yield from batch
+
+    def generate_batches(self, count, min_len, max_len, batch_size=StreamUtils.DEFAULT_BATCH_SIZE):
+        """Yield lists of at most batch_size random passcodes, built a block at a time"""
+        if min_len > max_len:
+            raise ValueError("Minimum length cannot be greater than maximum length!")
+        if max_len <= 0:
+            return  # Only empty passcodes would fit
+
+        remaining = count
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            remaining -= size
+            yield self._random_batch(size, min_len, max_len)
+
+    def _random_batch(self, size, min_len, max_len):
+        """Build one batch of passcodes from a single block of random characters"""
+        if min_len == max_len:
+            text = self._random_text(size * min_len)
+            return [text[i:i + min_len] for i in range(0, size * min_len, min_len)]
+
+        lengths = self._random_lengths(size, min_len, max_len)
+        ends = list(accumulate(lengths))
+        text = self._random_text(ends[-1])
+        return [text[end - length:end] for end, length in zip(ends, lengths)]
+
+    def _random_lengths(self, size, min_len, max_len):
+        """Draw size lengths uniformly from [min_len, max_len]"""
+        span = max_len - min_len + 1
+        if span <= 256:
+            limit = 256 - 256 % span
+            rejected = bytes(range(limit, 256))
+            return [min_len + b % span for b in self._accepted_bytes(size, limit, rejected)]
+
+        # Wide ranges draw 4 bytes per length; the bias is below 2^-32 * span
+        data = os.urandom(4 * size)
+        return [min_len + int.from_bytes(data[i:i + 4], 'little') % span for i in range(0, 4 * size, 4)]
+
+    def _random_text(self, length):
+        """Return length uniformly random characters from the alphabet"""
+        if self.use_numpy and self._ascii:
+            return self._numpy_random_text(length)
+
+        data = self._accepted_bytes(length, self._limit, self._rejected).translate(self._table)
+        if self._ascii:
+            return data.decode('ascii')
+        return data.decode('latin-1').translate(self._char_map)
+
+    def _numpy_random_text(self, length):
+        """Vectorized rejection sampling and alphabet lookup with NumPy"""
+        table = np.frombuffer(self._table, dtype=np.uint8)
+        chunks = []
+        needed = length
+
+        while needed > 0:
+            raw = np.frombuffer(os.urandom(self._block_size(needed, self._limit)), dtype=np.uint8)
+            accepted = raw[raw < self._limit][:needed]
+            chunks.append(table[accepted].tobytes())
+            needed -= len(accepted)
+
+        return b''.join(chunks).decode('ascii')
+
+    def _accepted_bytes(self, count, limit, rejected):
+        """Return count random bytes below limit, drawn in large os.urandom blocks"""
+        chunks = []
+        needed = count
+
+        while needed > 0:
+            accepted = os.urandom(self._block_size(needed, limit)).translate(None, rejected)[:needed]
+            chunks.append(accepted)
+            needed -= len(accepted)
 
-    def generate(self, count, min_len, max_len):
-        """Generate random alphanumeric passcodes"""
-        characters = string.ascii_letters + string.digits
-        passcodes = []
+        return b''.join(chunks)
 
-        for _ in range(count):
-            length = random.randint(min_len, max_len)
-            passcode = ''.join(random.choice(characters) for _ in range(length))
-            passcodes.append(passcode)
+    @staticmethod
+    def _block_size(needed, limit):
+        """Bytes to draw so that, after rejection, about needed bytes usually remain"""
+        return needed * 256 // limit + 64
 
-        return passcodes
+    def estimate(self, count, min_len, max_len):
+        """Count the candidates and expected bytes iter_generate would produce"""
+        # Lengths and characters are uniform, so multiply the averages
+        if max_len <= 0:
+            return 0, 0
+        average_char_bytes = len(self.alphabet.encode('utf-8')) / len(self.alphabet)
+        return count, round(count * (min_len + max_len) / 2 * average_char_bytes)
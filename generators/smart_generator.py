@@ -3,103 +3,131 @@ Smart combinations generator
 """
 
 from .base_generator import BaseGenerator
+from utils.rule_engine import BoundRules
 from utils.text_utils import TextUtils
 
 class SmartGenerator(BaseGenerator):
-    def generate(self, user_words_text, user_dates_text):
+    def _word_windows(self, user_words_text):
+        """Return the user words, the first 50 words (user + common) and the first 10 user words
+
+        Each list holds a word once; the windows are cut before repeats are
+        removed, so a repeated word never lets another word in.
+        """
+        user_words = []
+        if user_words_text:
+            user_words = [w.strip() for w in user_words_text.strip().split('\n') if w.strip()]
+
+        all_words = (user_words + list(self.data_loader.common_words[:50]))[:50]  # Limit to prevent explosion
+        return (list(dict.fromkeys(user_words)), list(dict.fromkeys(all_words)),
+                list(dict.fromkeys(user_words[:10])))
+
+    def iter_generate(self, user_words_text, user_dates_text):
         """Generate intelligent combinations of common passwords with user data"""
-        combinations = []
 
         if not self.data_loader:
-            return combinations
+            return
+
+        self._begin_units()
 
         # Parse user data
-        words = []
-        if user_words_text:
-            words = [w.strip() for w in user_words_text.strip().split('\n') if w.strip()]
+        words, all_words, pattern_words = self._word_windows(user_words_text)
 
         dates = []
         if user_dates_text:
             dates = TextUtils.parse_dates(user_dates_text)
 
-        # All words (user + common)
-        all_words = words + self.data_loader.common_words
+        word_common_rules = self.get_rules("smart_word_commons")
+        date_common_rules = self.get_rules("smart_date_commons")
+        word_date_rules = self.get_rules("smart_word_dates")
+        word_pattern_rules = self.get_rules("smart_word_patterns")
 
         # Combine common passwords with user words
-        for word in all_words[:50]:  # Limit to prevent explosion
+        for word in all_words:
             word_variations = self.get_case_variations(word)
+            word_shortest, word_longest = self._length_range(word_variations)
 
             for common in self.data_loader.common_passwords[:30]:  # Limit common passwords too
+                if not self._claim_unit():
+                    continue
                 common_variations = self.get_case_variations(common)
+                common_shortest, common_longest = self._length_range(common_variations)
+
+                if not self._any_fits(*word_common_rules.length_range(
+                        word=(word_shortest, word_longest), common=(common_shortest, common_longest))):
+                    continue
 
+                rules = BoundRules.chain(word_common_rules.bind(common=common_var)
+                                         for common_var in common_variations)
                 for word_var in word_variations:
-                    for common_var in common_variations:
-                        combinations.extend([
-                            common_var + word_var,
-                            word_var + common_var,
-                            common_var + word_var + "!",
-                            word_var + common_var + "!",
-                            common_var + word_var + "123",
-                            word_var + common_var + "123",
-                            common_var + "_" + word_var,
-                            word_var + "_" + common_var,
-                            common_var + "." + word_var,
-                            word_var + "." + common_var,
-                            common_var + word_var + "@",
-                            word_var + common_var + "@"
-                        ])
+                    yield from self._expand_rules(rules, [word_var])
 
         # Combine common passwords with user dates
         for date in dates:
+            rules = date_common_rules.bind(date=date)
             for common in self.data_loader.common_passwords[:30]:
+                if not self._claim_unit():
+                    continue
                 common_variations = self.get_case_variations(common)
 
-                for common_var in common_variations:
-                    combinations.extend([
-                        common_var + date,
-                        date + common_var,
-                        common_var + date + "!",
-                        date + common_var + "!",
-                        common_var + "_" + date,
-                        date + "_" + common_var,
-                        common_var + "." + date,
-                        date + "." + common_var,
-                        common_var + date + "@",
-                        date + common_var + "@",
-                        common_var + date + "#",
-                        date + common_var + "#"
-                    ])
+                yield from self._expand_rules(rules, common_variations)
 
         # Combine user words with user dates
         for word in words:
             word_variations = self.get_case_variations(word)
 
             for date in dates:
-                for word_var in word_variations:
-                    combinations.extend([
-                        word_var + date,
-                        date + word_var,
-                        word_var + date + "!",
-                        date + word_var + "!",
-                        word_var + "_" + date,
-                        date + "_" + word_var,
-                        word_var + date + "@",
-                        date + word_var + "@",
-                        word_var + "." + date,
-                        date + "." + word_var
-                    ])
+                if not self._claim_unit():
+                    continue
+                rules = word_date_rules.bind(date=date)
+                yield from self._expand_rules(rules, word_variations)
 
         # Pattern combinations
         for pattern in self.data_loader.common_patterns[:30]:
-            for word in words[:10]:
+            rules = word_pattern_rules.bind(pattern=pattern)
+            for word in pattern_words:
+                if not self._claim_unit():
+                    continue
                 word_variations = self.get_case_variations(word)
 
-                for word_var in word_variations:
-                    combinations.extend([
-                        word_var + pattern,
-                        pattern + word_var,
-                        word_var + pattern + "!",
-                        pattern + word_var + "!"
-                    ])
-
-        return combinations
+                yield from self._expand_rules(rules, word_variations)
+
+    def estimate(self, user_words_text, user_dates_text):
+        """Count the candidates and bytes iter_generate would produce"""
+        self._begin_estimate()
+        if not self.data_loader:
+            return self._estimate_result()
+
+        words, all_words, pattern_words = self._word_windows(user_words_text)
+
+        dates = []
+        if user_dates_text:
+            dates = TextUtils.parse_dates(user_dates_text)
+
+        common_sizes = [self.get_variation_sizes(common) for common in self.data_loader.common_passwords[:30]]
+        word_common_rules = self.get_rules("smart_word_commons")
+        date_common_rules = self.get_rules("smart_date_commons")
+        word_date_rules = self.get_rules("smart_word_dates")
+        word_pattern_rules = self.get_rules("smart_word_patterns")
+
+        for word in all_words:
+            word_sizes = self.get_variation_sizes(word)
+            for sizes in common_sizes:
+                for common_size, count in sizes.items():
+                    self._tally_rules(word_sizes, word_common_rules.size_additions(common=common_size), count)
+
+        for date in dates:
+            additions = date_common_rules.size_additions(date=self._text_size(date))
+            for sizes in common_sizes:
+                self._tally_rules(sizes, additions)
+
+        for word in words:
+            word_sizes = self.get_variation_sizes(word)
+            for date in dates:
+                self._tally_rules(word_sizes, word_date_rules.size_additions(date=self._text_size(date)))
+
+        for pattern in self.data_loader.common_patterns[:30]:
+            additions = word_pattern_rules.size_additions(pattern=self._text_size(pattern))
+            for word in pattern_words:
+                self._tally_rules(self.get_variation_sizes(word), additions)
+
+        return self._estimate_result()
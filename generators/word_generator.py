@@ -2,71 +2,119 @@
 Word-based passcode generator
 """
 
+from itertools import chain
+
 from .base_generator import BaseGenerator
-from utils.text_utils import TextUtils
 
 class WordGenerator(BaseGenerator):
-    def __init__(self, data_loader=None, use_case_variations=False):
-        super().__init__(data_loader, use_case_variations)
+    def __init__(self, data_loader=None, use_case_variations=False, **kwargs):
+        super().__init__(data_loader, use_case_variations, **kwargs)
         self.status_callback = None
 
     def set_status_callback(self, callback):
         """Set callback function for status updates"""
         self.status_callback = callback
 
+    def __getstate__(self):
+        """Drop the status callback when sent to a worker process"""
+        state = self.__dict__.copy()
+        state['status_callback'] = None
+        return state
+
     def _update_status(self, message):
         """Update status if callback is set"""
         if self.status_callback:
             self.status_callback(message)
 
-    def generate(self, user_words):
+    def _all_words(self, user_words):
+        """User words, each once, followed by the common words that are not user words
+
+        Common words are streamed from the data loader; their own repeats are
+        left to the final deduplication, so a large wordlist is never held in memory.
+        """
+        user_words = list(dict.fromkeys(word.strip() for word in user_words))
+        if not self.data_loader:
+            return user_words
+        user_set = set(user_words)
+        return chain(user_words, (word for word in self.data_loader.common_words if word.strip() not in user_set))
+
+    def iter_generate(self, user_words):
         """Generate combinations of words with numbers and variations"""
-        combinations = []
 
-        # Add common words to user words
-        all_words = user_words + (self.data_loader.common_words if self.data_loader else [])
+        all_words = self._all_words(user_words)
+
+        self._begin_units()
+        pattern_rules = self.get_rules("word_patterns")
+        special_rules = self.get_rules("word_specials")
 
         for word in all_words:
             word = word.strip()
             if not word:
                 continue
 
+            # Each word's own variants form units, each pattern another
+            owns_word = self._claim_unit()
+
             # Generate case variations based on setting
             variations = self.get_case_variations(word)
-            if self.use_case_variations:
+            if self.use_case_variations and owns_word:
                 self._update_status(f"Generating case variations for '{word}': {len(variations)} combinations")
 
-            combinations.extend(variations)
+            if owns_word:
+                for variation in variations:
+                    if self._fits(len(variation)):
+                        yield variation
+
+            shortest, longest = self._length_range(variations)
 
             # Add word with common patterns
             if self.data_loader:
                 for pattern in self.data_loader.common_patterns:
-                    for variation in variations:
-                        combinations.extend([
-                            variation + pattern,
-                            pattern + variation,
-                            variation + pattern + "!",
-                            variation + pattern + "@",
-                            variation + "_" + pattern,
-                            pattern + "_" + variation
-                        ])
+                    if not self._claim_unit():
+                        continue
+                    if not self._any_fits(*pattern_rules.length_range(
+                            word=(shortest, longest), pattern=(len(pattern), len(pattern)))):
+                        continue
+                    rules = pattern_rules.bind(pattern=pattern)
+                    yield from self._expand_rules(rules, variations)
+
+            # The word's remaining variants form one more unit
+            if not self._claim_unit():
+                continue
 
             # Add word with special characters (limit to prevent explosion)
             for char in self.special_chars[:10]:  # Use first 10 special chars
-                for variation in variations:
-                    combinations.extend([
-                        variation + char,
-                        char + variation,
-                        variation + char + "1",
-                        variation + "1" + char,
-                        variation + char + char,
-                        char + variation + char
-                    ])
+                if not self._any_fits(*special_rules.length_range(
+                        word=(shortest, longest), char=(len(char), len(char)))):
+                    continue
+                rules = special_rules.bind(char=char)
+                yield from self._expand_rules(rules, variations)
 
             # Add leetspeak variations
-            leet_word = TextUtils.to_leetspeak(word)
-            if leet_word != word:
-                leet_variations = self.get_case_variations(leet_word)
-                combinations.extend(leet_variations)
+            yield from self.iter_leet_variations(word)
+
+    def estimate(self, user_words):
+        """Count the candidates and bytes iter_generate would produce"""
+        self._begin_estimate()
+        all_words = self._all_words(user_words)
+        pattern_rules = self.get_rules("word_patterns")
+        special_rules = self.get_rules("word_specials")
+
+        for word in all_words:
+            word = word.strip()
+            if not word:
+                continue
+
+            word_sizes = self.get_variation_sizes(word)
+            self._tally(word_sizes)
+
+            if self.data_loader:
+                for pattern in self.data_loader.common_patterns:
+                    self._tally_rules(word_sizes, pattern_rules.size_additions(pattern=self._text_size(pattern)))
+
+            for char in self.special_chars[:10]:
+                self._tally_rules(word_sizes, special_rules.size_additions(char=self._text_size(char)))
+
+            self.tally_leet_variations(word)
 
-        return combinations
+        return self._estimate_result()
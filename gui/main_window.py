@@ -5,17 +5,21 @@ Main GUI window for the Passcode Generator
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import queue
+import threading
 
 from utils.data_loader import DataLoader
 from utils.file_manager import FileManager
-from generators.common_generator import CommonGenerator
-from generators.date_generator import DateGenerator
-from generators.word_generator import WordGenerator
-from generators.random_generator import RandomGenerator
-from generators.smart_generator import SmartGenerator
 from utils.password_filter import PasswordFilter
+from utils.stream_utils import GenerationCancelled
+from utils.text_utils import TextUtils
+from utils.compressed_writer import CompressedWriter
+from generators.random_generator import RandomGenerator
+from engine.generation_engine import GenerationEngine, GenerationOptions
 
 class PasscodeGeneratorGUI:
+    POLL_INTERVAL_MS = 100
+
     def __init__(self, root):
         self.root = root
         self.root.title("Advanced Passcode Generator")
@@ -23,11 +27,17 @@ class PasscodeGeneratorGUI:
         self.root.resizable(True, True)
         self.exclude_previous = tk.BooleanVar(value=False)
         self.previous_file_path = tk.StringVar(value="")
+        self.cache_previous = tk.BooleanVar(value=False)
 
         # Initialize components
         self.data_loader = DataLoader()
         self.file_manager = FileManager()
         self.password_filter = PasswordFilter()
+        self.engine = GenerationEngine(self.data_loader, self.file_manager, self.password_filter)
+
+        # Background generation state
+        self.worker = None
+        self.message_queue = queue.Queue()
 
         # Variables
         self.min_length = tk.IntVar(value=6)
@@ -38,11 +48,14 @@ class PasscodeGeneratorGUI:
         self.include_common = tk.BooleanVar(value=True)
         self.include_combinations = tk.BooleanVar(value=True)
         self.include_case_variations = tk.BooleanVar(value=True)
+        self.extended_case_variations = tk.BooleanVar(value=False)
         self.num_random = tk.IntVar(value=100)
+        self.random_alphabet = tk.StringVar(value=RandomGenerator.DEFAULT_ALPHABET)
 
         # Delimiter options
         self.delimiter_option = tk.StringVar(value="newline")
         self.custom_delimiter = tk.StringVar(value="")
+        self.compression_option = tk.StringVar(value="none")
 
         self.setup_ui()
 
@@ -179,6 +192,14 @@ class PasscodeGeneratorGUI:
                                   font=("Arial", 8), foreground="gray", wraplength=500)
         delimiter_info.grid(row=4, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
 
+        # Compression option
+        compression_frame = ttk.Frame(delimiter_frame)
+        compression_frame.grid(row=5, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
+
+        ttk.Label(compression_frame, text="Compression:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Combobox(compression_frame, textvariable=self.compression_option, state="readonly", width=8,
+                     values=["none"] + sorted(CompressedWriter.EXTENSIONS)).grid(row=0, column=1, padx=(10, 0))
+
     def _setup_previous_passwords_frame(self, parent, row):
         """Set up previous passwords exclusion frame"""
         previous_frame = ttk.LabelFrame(parent, text="Previous Passwords Exclusion", padding="10")
@@ -210,16 +231,29 @@ class PasscodeGeneratorGUI:
                             font=("Arial", 8), foreground="gray", wraplength=500)
         info_label.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
 
+        # Parse cache, off by default since it copies the passwords outside the chosen file
+        cache_check = ttk.Checkbutton(previous_frame, text="Cache the parsed file so later runs load it faster",
+                                      variable=self.cache_previous)
+        cache_check.grid(row=3, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+
+        cache_label = ttk.Label(previous_frame,
+                                text=f"🔒 Stores a compressed copy of the file's passwords in "
+                                     f"{self.password_filter.cache_dir}",
+                                font=("Arial", 8), foreground="gray", wraplength=500)
+        cache_label.grid(row=4, column=0, columnspan=3, sticky=tk.W, pady=(2, 0))
+
         # Bind checkbox to enable/disable file selection
         def on_checkbox_change():
             if self.exclude_previous.get():
                 self.previous_file_entry.config(state="readonly")
                 browse_btn.config(state="normal")
                 clear_btn.config(state="normal")
+                cache_check.config(state="normal")
             else:
                 self.previous_file_entry.config(state="disabled")
                 browse_btn.config(state="disabled")
                 clear_btn.config(state="disabled")
+                cache_check.config(state="disabled")
 
         self.exclude_previous.trace_add("write", lambda *args: on_checkbox_change())
         on_checkbox_change()  # Set initial state
@@ -258,6 +292,9 @@ class PasscodeGeneratorGUI:
                               font=("Arial", 8), foreground="red", wraplength=500)
         case_info.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
 
+        ttk.Checkbutton(case_frame, text="Also vary the letters of mixed words (e.g. 'pass123' → 'PaSs123')", 
+                       variable=self.extended_case_variations).grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+
     def _setup_common_frame(self, parent, row):
         """Set up common passwords frame"""
         common_frame = ttk.LabelFrame(parent, text="Common Passwords & Patterns", padding="10")
@@ -336,6 +373,10 @@ class PasscodeGeneratorGUI:
                                  textvariable=self.num_random)
         random_spin.grid(row=1, column=1, padx=(10, 0), pady=(10, 0))
 
+        ttk.Label(random_frame, text="Characters:").grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Entry(random_frame, textvariable=self.random_alphabet, width=40).grid(
+            row=2, column=1, sticky=tk.W, padx=(10, 0), pady=(5, 0))
+
     def _setup_warning_frame(self, parent, row):
         """Set up warning frame"""
         warning_frame = ttk.LabelFrame(parent, text="File Size Management", padding="10")
@@ -349,10 +390,18 @@ class PasscodeGeneratorGUI:
 
     def _setup_controls_frame(self, parent, row):
         """Set up controls and progress frame"""
+        buttons_frame = ttk.Frame(parent)
+        buttons_frame.grid(row=row, column=0, columnspan=2, pady=20)
+
         # Generate button
-        generate_btn = ttk.Button(parent, text="Generate Passcodes", 
-                                 command=self.generate_passcodes, style="Accent.TButton")
-        generate_btn.grid(row=row, column=0, columnspan=2, pady=20)
+        self.generate_btn = ttk.Button(buttons_frame, text="Generate Passcodes", 
+                                      command=self.generate_passcodes, style="Accent.TButton")
+        self.generate_btn.grid(row=0, column=0)
+
+        # Cancel button, only enabled while a generation is running
+        self.cancel_btn = ttk.Button(buttons_frame, text="Cancel", 
+                                    command=self.cancel_generation, state="disabled")
+        self.cancel_btn.grid(row=0, column=1, padx=(10, 0))
 
         # Progress bar
         self.progress = ttk.Progressbar(parent, mode='indeterminate')
@@ -364,223 +413,184 @@ class PasscodeGeneratorGUI:
 
     def get_delimiter(self):
         """Get the selected delimiter character(s)"""
-        option = self.delimiter_option.get()
-
-        delimiter_map = {
-            "newline": "\n",
-            "comma": ",",
-            "semicolon": ";",
-            "tab": "\t",
-            "space": " ",
-            "pipe": "|"
-        }
-
-        if option == "custom":
-            custom = self.custom_delimiter.get()
-            # Handle escape sequences
-            custom = custom.replace("\\n", "\n")
-            custom = custom.replace("\\t", "\t")
-            custom = custom.replace("\\r", "\r")
-            return custom if custom else "\n"  # Default to newline if empty
-
-        return delimiter_map.get(option, "\n")  # Default fallback
+        return GenerationEngine.resolve_delimiter(self.delimiter_option.get(), self.custom_delimiter.get())
 
-    def get_file_extension(self):
-        """Get appropriate file extension based on delimiter"""
-        option = self.delimiter_option.get()
+    def get_compression(self):
+        """Get the selected compression, or None for plain text"""
+        compression = self.compression_option.get()
+        return None if compression == "none" else compression
 
-        if option == "comma":
-            return ".csv"
-        elif option == "tab":
-            return ".tsv"
-        else:
-            return ".txt"
-
-    def filter_by_length(self, passcodes, min_len, max_len):
-        """Filter passcodes by length requirements"""
-        return [p for p in passcodes if min_len <= len(p) <= max_len]
+    def get_file_extension(self):
+        """Get appropriate file extension based on delimiter and compression"""
+        return GenerationEngine.file_extension_for(self.delimiter_option.get(), self.get_compression())
+
+    def get_generation_options(self):
+        """Collect the current GUI settings into engine options"""
+        previous_file = None
+        if self.exclude_previous.get() and self.previous_file_path.get():
+            previous_file = self.previous_file_path.get()
+
+        return GenerationOptions(
+            min_length=self.min_length.get(),
+            max_length=self.max_length.get(),
+            delimiter=self.get_delimiter(),
+            use_case_variations=self.include_case_variations.get(),
+            case_mode=(TextUtils.CASE_MODE_EXTENDED if self.extended_case_variations.get()
+                       else TextUtils.CASE_MODE_COMPAT),
+            include_common=self.include_common.get(),
+            include_dates=self.include_dates.get(),
+            include_words=self.include_words.get(),
+            include_combinations=self.include_combinations.get(),
+            include_random=self.include_random.get(),
+            words_text=self.words_text.get("1.0", tk.END),
+            dates_text=self.dates_text.get("1.0", tk.END),
+            num_random=self.num_random.get(),
+            random_alphabet=self.random_alphabet.get() or None,
+            previous_file=previous_file,
+            compression=self.get_compression()
+        )
 
     def generate_passcodes(self):
-        """Main function to generate all passcodes"""
-        try:
-            ## Warning for case variations
-            if self.include_case_variations.get():
-                result = messagebox.askyesno("Warning", 
-                    "⚠️ You have enabled ALL case variations!\n\n" +
-                    "This will generate MASSIVE wordlists that could be:\n" +
-                    "• Tens of millions of passcodes\n" +
-                    "• Multiple gigabytes in size\n" +
-                    "• Take a very long time to generate\n\n" +
-                    "Are you sure you want to continue?")
-                if not result:
-                    return
-
-            self.progress.start()
-            self.status_label.config(text="Initializing generation...")
-            self.root.update()
-
-            # Load previous passwords if exclusion is enabled
-            previous_passwords = set()
-            if self.exclude_previous.get() and self.previous_file_path.get():
-                self.password_filter.set_status_callback(lambda msg: self._update_status(msg))
-                previous_passwords = self.password_filter.load_previous_passwords(self.previous_file_path.get())
+        """Collect settings on the UI thread and start generation on a worker thread"""
+        if self.worker is not None and self.worker.is_alive():
+            return
 
-                if previous_passwords:
-                    self.status_label.config(text=f"Loaded {len(previous_passwords):,} previous passwords for exclusion")
-                    self.root.update()
-
-            all_passcodes = []
-            min_len = self.min_length.get()
-            max_len = self.max_length.get()
-
-            if min_len > max_len:
-                messagebox.showerror("Error", "Minimum length cannot be greater than maximum length!")
-                return
-
-            # Generate common passwords
-            if self.include_common.get():
-                self.status_label.config(text="Generating common passwords and patterns...")
-                self.root.update()
-
-                common_gen = CommonGenerator(self.data_loader, self.include_case_variations.get())
-                common_passcodes = common_gen.generate()
-                filtered_common = self.filter_by_length(common_passcodes, min_len, max_len)
-                all_passcodes.extend(filtered_common)
-
-                self.status_label.config(text=f"Generated {len(filtered_common):,} common password variations")
-                self.root.update()
-
-            # Generate date-based passcodes
-            if self.include_dates.get():
-                self.status_label.config(text="Generating date-based passcodes...")
-                self.root.update()
-
-                date_text = self.dates_text.get("1.0", tk.END)
-                if date_text.strip():
-                    date_gen = DateGenerator(self.data_loader, self.include_case_variations.get())
-                    date_combinations = date_gen.generate(date_text)
-                    filtered_dates = self.filter_by_length(date_combinations, min_len, max_len)
-                    all_passcodes.extend(filtered_dates)
-
-                    self.status_label.config(text=f"Generated {len(filtered_dates):,} date-based passcodes")
-                    self.root.update()
-
-            # Generate word-based passcodes
-            if self.include_words.get():
-                self.status_label.config(text="Generating word-based passcodes...")
-                self.root.update()
-
-                words_text = self.words_text.get("1.0", tk.END)
-                words = []
-                if words_text.strip():
-                    words = words_text.strip().split('\n')
-
-                word_gen = WordGenerator(self.data_loader, self.include_case_variations.get())
-                word_gen.set_status_callback(lambda msg: self._update_status(msg))
-                word_combinations = word_gen.generate(words)
-                filtered_words = self.filter_by_length(word_combinations, min_len, max_len)
-                all_passcodes.extend(filtered_words)
-
-                self.status_label.config(text=f"Generated {len(filtered_words):,} word-based passcodes")
-                self.root.update()
-
-            # Generate smart combinations
-            if self.include_combinations.get():
-                self.status_label.config(text="Generating smart combinations...")
-                self.root.update()
-
-                words_text = self.words_text.get("1.0", tk.END)
-                dates_text = self.dates_text.get("1.0", tk.END)
-
-                smart_gen = SmartGenerator(self.data_loader, self.include_case_variations.get())
-                smart_combinations = smart_gen.generate(words_text, dates_text)
-                filtered_smart = self.filter_by_length(smart_combinations, min_len, max_len)
-                all_passcodes.extend(filtered_smart)
-
-                self.status_label.config(text=f"Generated {len(filtered_smart):,} smart combinations")
-                self.root.update()
-
-            # Generate random passcodes
-            if self.include_random.get():
-                self.status_label.config(text="Generating random passcodes...")
-                self.root.update()
-
-                random_gen = RandomGenerator()
-                random_passcodes = random_gen.generate(self.num_random.get(), min_len, max_len)
-                all_passcodes.extend(random_passcodes)
-
-                self.status_label.config(text=f"Generated {len(random_passcodes):,} random passcodes")
-                self.root.update()
-
-            if not all_passcodes:
-                messagebox.showwarning("Warning", "No passcodes generated! Please select at least one generation method.")
-                return
-
-            # Remove duplicates
-            self.status_label.config(text="Removing duplicates...")
-            self.root.update()
-            unique_passcodes = list(set(all_passcodes))
-
-            # Filter out previous passwords if enabled
-            if previous_passwords:
-                unique_passcodes = self.password_filter.filter_passwords(unique_passcodes, previous_passwords)
-
-            self.status_label.config(text=f"Generated {len(unique_passcodes):,} unique passcodes")
-            self.root.update()
-
-            if not unique_passcodes:
-                messagebox.showwarning("Warning", "No new passcodes generated! All passwords were duplicates of previous file.")
-                return
-
-            # Ask for save location
-            file_path = filedialog.asksaveasfilename(
-                defaultextension=self.get_file_extension(),
-                filetypes=[
-                    ("Text files", "*.txt"),
-                    ("CSV files", "*.csv"),
-                    ("TSV files", "*.tsv"),
-                    ("All files", "*.*")
-                ],
-                title="Save Passcode List"
+        try:
+            options = self.get_generation_options()
+            estimate = self.engine.estimate(options)
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        candidates = estimate['candidates']
+        size = FileManager.format_size(estimate['bytes'])
+        self.status_label.config(text=f"Estimated: up to {candidates:,} passcodes, {size}")
+
+        ## Warning for case variations or very large outputs
+        if self.include_case_variations.get() or estimate['bytes'] > FileManager.MAX_FILE_SIZE:
+            stage_lines = "".join(
+                f"• {name}: {count:,} ({FileManager.format_size(stage_bytes)})\n"
+                for name, (count, stage_bytes) in estimate['stages'].items()
             )
-
-            if not file_path:
+            result = messagebox.askyesno("Warning", 
+                "⚠️ This will generate a large wordlist!\n\n" +
+                f"Estimated before removing duplicates:\n{stage_lines}\n" +
+                f"Total: up to {candidates:,} passcodes, about {size} uncompressed\n\n" +
+                "Are you sure you want to continue?")
+            if not result:
                 return
 
-            # Remove extension from file_path for base filename
-            base_filename = os.path.splitext(file_path)[0]
+        # Candidates are streamed straight to disk, so ask for the save location first
+        file_extension = self.get_file_extension()
+        compressed_extension = file_extension[len(GenerationEngine.file_extension_for(self.delimiter_option.get())):]
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=file_extension,
+            filetypes=[
+                ("Text files", "*.txt" + compressed_extension),
+                ("CSV files", "*.csv" + compressed_extension),
+                ("TSV files", "*.tsv" + compressed_extension),
+                ("All files", "*.*")
+            ],
+            title="Save Passcode List"
+        )
 
-            # Save passcodes with splitting
-            self.status_label.config(text="Saving passcodes...")
-            self.root.update()
+        if not file_path:
+            return
+
+        # Remove extension from file_path for base filename
+        if compressed_extension and file_path.endswith(compressed_extension):
+            file_path = file_path[:-len(compressed_extension)]
+        base_filename = os.path.splitext(file_path)[0]
+
+        self.generate_btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
+        self.progress.start()
+        self.status_label.config(text="Initializing generation...")
+
+        # The worker never touches Tk; it reports through the queue polled below
+        self.password_filter.use_cache = self.cache_previous.get()
+        self.engine.set_status_callback(lambda msg: self.message_queue.put(("status", msg)))
+        # Cleared here rather than on the worker, so a Cancel clicked right after starting still counts
+        self.engine.reset_cancel()
+        self.worker = threading.Thread(
+            target=self._run_generation,
+            args=(options, base_filename, GenerationEngine.file_extension_for(self.delimiter_option.get())),
+            daemon=True
+        )
+        self.worker.start()
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_messages)
 
-            self.file_manager.set_status_callback(lambda msg: self._update_status(msg))
-            files_created = self.file_manager.save_with_splitting(
-                unique_passcodes, base_filename, self.get_delimiter(), self.get_file_extension()
-            )
+    def cancel_generation(self):
+        """Stop the running generation at the next batch boundary"""
+        self.engine.cancel()
+        self.cancel_btn.config(state="disabled")
+        self.status_label.config(text="Cancelling...")
 
-            self.progress.stop()
+    def _run_generation(self, options, base_filename, file_extension):
+        """Worker thread body: run the engine and post the outcome to the queue"""
+        try:
+            files_created = self.engine.save(options, base_filename, file_extension)
+            self.message_queue.put(("done", files_created, self.file_manager.written_count,
+                                    self.engine.generated_count))
+        except GenerationCancelled:
+            self.message_queue.put(("cancelled",))
+        except Exception as e:
+            self.message_queue.put(("error", str(e)))
 
-            # Show completion message
-            if len(files_created) == 1:
-                message = f"Successfully generated {len(unique_passcodes):,} passcodes!\n\nSaved to: {files_created[0]}"
+    def _poll_messages(self):
+        """Drain worker messages on the UI thread and reschedule while running"""
+        try:
+            while True:
+                message = self.message_queue.get_nowait()
+                kind = message[0]
+
+                if kind == "status":
+                    self.status_label.config(text=message[1])
+                elif kind == "done":
+                    self._finish_generation()
+                    self._show_results(*message[1:])
+                    return
+                elif kind == "cancelled":
+                    self._finish_generation()
+                    self.status_label.config(text="Generation cancelled")
+                    return
+                elif kind == "error":
+                    self._finish_generation()
+                    messagebox.showerror("Error", f"An error occurred: {message[1]}")
+                    self.status_label.config(text="Error occurred during generation")
+                    return
+        except queue.Empty:
+            pass
+
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_messages)
+
+    def _finish_generation(self):
+        """Restore the controls once the worker has stopped"""
+        self.progress.stop()
+        self.generate_btn.config(state="normal")
+        self.cancel_btn.config(state="disabled")
+        self.worker = None
+
+    def _show_results(self, files_created, written_count, generated_count):
+        """Report the outcome of a completed generation"""
+        if not files_created:
+            if generated_count == 0:
+                messagebox.showwarning("Warning", "No passcodes generated! Please select at least one generation method.")
             else:
-                message = f"Successfully generated {len(unique_passcodes):,} passcodes!\n\nSaved to {len(files_created)} files:\n"
-                for file in files_created:
-                    message += f"• {os.path.basename(file)}\n"
-
-            messagebox.showinfo("Success", message)
-            self.status_label.config(text=f"Completed! Generated {len(unique_passcodes):,} unique passcodes")
+                messagebox.showwarning("Warning", "No new passcodes generated! All passwords were duplicates of previous file.")
+            self.status_label.config(text="Ready to generate passcodes")
+            return
 
-        except Exception as e:
-            self.progress.stop()
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
-            self.status_label.config(text="Error occurred during generation")
+        # Show completion message
+        if len(files_created) == 1:
+            message = f"Successfully generated {written_count:,} passcodes!\n\nSaved to: {files_created[0]}"
+        else:
+            message = f"Successfully generated {written_count:,} passcodes!\n\nSaved to {len(files_created)} files:\n"
+            for file in files_created:
+                message += f"• {os.path.basename(file)}\n"
 
-    def _update_status(self, message):
-        """Update status label and refresh UI"""
-        self.status_label.config(text=message)
-        self.root.update()
+        messagebox.showinfo("Success", message)
+        self.status_label.config(text=f"Completed! Generated {written_count:,} unique passcodes")
 
     def _browse_previous_file(self):
         """Browse for previous password file"""
@@ -599,16 +609,33 @@ class PasscodeGeneratorGUI:
             # Automatically enable the checkbox when file is selected
             self.exclude_previous.set(True)
 
-            # Show file statistics
-            stats = self.password_filter.get_file_stats(file_path)
-            if stats:
-                file_size_mb = stats['file_size'] / (1024 * 1024)
-                messagebox.showinfo("File Statistics", 
-                    f"File: {stats['file_name']}\n"
-                    f"Size: {file_size_mb:.2f} MB\n"
-                    f"Estimated passwords: {stats['password_count']:,}\n\n"
-                    f"These passwords will be excluded from new results.")
-                
+            # Parsing a large file takes seconds, so count its passwords off the UI thread
+            self._load_file_stats(file_path)
+
+    def _load_file_stats(self, file_path):
+        """Read the statistics of a previous file on a worker thread"""
+        stats = {}
+        # A separate filter keeps the worker clear of the engine's status callback; the cache is shared
+        password_filter = PasswordFilter(self.password_filter.cache_dir, use_cache=self.cache_previous.get())
+        thread = threading.Thread(target=lambda: stats.update(password_filter.get_file_stats(file_path)),
+                                  daemon=True)
+        thread.start()
+        self.root.after(self.POLL_INTERVAL_MS, self._poll_file_stats, thread, stats)
+
+    def _poll_file_stats(self, thread, stats):
+        """Show the statistics once the worker from _load_file_stats has finished"""
+        if thread.is_alive():
+            self.root.after(self.POLL_INTERVAL_MS, self._poll_file_stats, thread, stats)
+            return
+
+        if stats:
+            file_size_mb = stats['file_size'] / (1024 * 1024)
+            messagebox.showinfo("File Statistics", 
+                f"File: {stats['file_name']}\n"
+                f"Size: {file_size_mb:.2f} MB\n"
+                f"Estimated passwords: {stats['password_count']:,}\n\n"
+                f"These passwords will be excluded from new results.")
+
     def _setup_warning_frame(self, parent, row):
         """Set up warning frame"""
         warning_frame = ttk.LabelFrame(parent, text="File Size Management", padding="10")
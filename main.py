@@ -4,11 +4,18 @@ Advanced Passcode Generator
 Main application entry point
 """
 
-import tkinter as tk
-from gui.main_window import PasscodeGeneratorGUI
+import sys
 
 def main():
     """Main application entry point"""
+    # Any command-line arguments select the headless CLI, which never loads tkinter
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    import tkinter as tk
+    from gui.main_window import PasscodeGeneratorGUI
+
     root = tk.Tk()
     app = PasscodeGeneratorGUI(root)
     root.mainloop()
@@ -1,6 +1,13 @@
 """Utility modules for the Passcode Generator"""
 
 from .data_loader import DataLoader
+from .wordlist import MappedWordlist
 from .file_manager import FileManager
 from .text_utils import TextUtils
 from .password_filter import PasswordFilter
+from .stream_utils import StreamUtils, GenerationCancelled
+from .external_sort import ExternalDeduplicator
+from .password_index import PasswordIndex
+from .compressed_writer import CompressedWriter
+from .rule_engine import ManglingRules
+from .checkpoint import Checkpoint
@@ -0,0 +1,52 @@
+"""
+Checkpoint files that let a long generation run resume after a crash
+"""
+
+import json
+import os
+
+class Checkpoint:
+    """Progress of a run, saved atomically as JSON
+
+    A checkpoint records the generator stage and position reached, the
+    output parts written so far and how far the last one extends, so a
+    restarted run can append to the parts instead of starting over.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        """Check whether a checkpoint has been saved"""
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Return the saved state, raising ValueError if it cannot be resumed"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read checkpoint {self.path}: {e}")
+
+        if not isinstance(state, dict) or state.get('version') != self.VERSION:
+            raise ValueError(f"Checkpoint {self.path} was written by an incompatible version")
+        return state
+
+    def save(self, state):
+        """Write the state so that a crash leaves either the old or the new checkpoint"""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(state, version=self.VERSION), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def remove(self):
+        """Delete the checkpoint once the run has finished"""
+        for path in (self.path, self.path + ".tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
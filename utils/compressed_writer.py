@@ -0,0 +1,207 @@
+"""
+Streaming compressed output written on a background thread
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import queue
+import threading
+import zlib
+
+class CompressedWriter:
+    """File-like writer that compresses on a background thread
+
+    write() only queues encoded bytes, so compression overlaps with
+    generation. With max_size set, a new part is started before the
+    compressed size of the current one would pass it; next_filename is
+    called (on the writer thread) to name each new part. With append set,
+    the first part is continued as a further compressed stream, which
+    gzip, bz2 and xz readers decompress as one.
+    """
+
+    EXTENSIONS = {
+        "gzip": ".gz",
+        "bz2": ".bz2",
+        "xz": ".xz"
+    }
+    # Accepted compresslevel (gzip, bz2) or preset (xz) values
+    LEVELS = {
+        "gzip": range(1, 10),
+        "bz2": range(1, 10),
+        "xz": range(0, 10)
+    }
+    # Incompressible input grows by under 1% plus headers and trailers with each codec
+    GROWTH_DIVISOR = 100
+    CODEC_OVERHEAD = 1024
+    # A part is closed once less than 1/MIN_ROOM_DIVISOR of it is left, so bz2 and xz,
+    # which restart their stream on each exact flush, restart only a few times per part
+    MIN_ROOM_DIVISOR = 64
+    QUEUE_SIZE = 64  # Pending chunks before write() blocks
+    RAW_BUFFER_SIZE = 1024 * 1024
+
+    def __init__(self, filename, compression, level=None, max_size=None, next_filename=None, append=False):
+        self.check_level(compression, level)
+
+        self.compression = compression
+        self.level = level
+        self.max_size = max_size
+        self.next_filename = next_filename
+        self.error = None
+        self.closed = False
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._synced = threading.Event()
+        self._synced_size = 0
+
+        self._open_part(filename, 'ab' if append else 'wb')
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def check_level(cls, compression, level):
+        """Raise ValueError for an unsupported compression or a level it does not accept"""
+        if compression not in cls.EXTENSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        levels = cls.LEVELS[compression]
+        if level is not None and level not in levels:
+            raise ValueError(f"{compression} compression level must be between "
+                             f"{levels[0]} and {levels[-1]}!")
+
+    def _open_part(self, filename, mode='wb'):
+        """Open the raw file and the compressor that writes into it"""
+        self._raw = open(filename, mode, buffering=self.RAW_BUFFER_SIZE)
+        self._written = False
+        # Uncompressed bytes the compressor may still hold back from the raw file
+        self._pending = 0
+        try:
+            self._open_stream()
+        except BaseException:
+            self._raw.close()
+            raise
+
+    @classmethod
+    def _compressed_bound(cls, size):
+        """Most bytes size bytes of input can take once compressed, stream trailer included"""
+        return size + size // cls.GROWTH_DIVISOR + cls.CODEC_OVERHEAD
+
+    def _flush_stream(self):
+        """Push everything the compressor holds into the raw file, so its size is exact
+
+        gzip sync-flushes and carries on; bz2 and xz cannot, so their stream
+        is finished and the next write starts another one in the same file.
+        """
+        if self._stream is None:
+            return
+        if self.compression == "gzip":
+            self._stream.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            self._stream.close()
+            self._stream = None
+        self._pending = 0
+
+    def _open_stream(self):
+        """Start a compressed stream at the raw file's current position"""
+        if self.compression == "gzip":
+            # A fixed mtime keeps the output reproducible
+            level = 9 if self.level is None else self.level
+            self._stream = gzip.GzipFile(filename='', mode='wb', fileobj=self._raw, compresslevel=level, mtime=0)
+        elif self.compression == "bz2":
+            level = 9 if self.level is None else self.level
+            self._stream = bz2.BZ2File(self._raw, 'wb', compresslevel=level)
+        else:
+            self._stream = lzma.LZMAFile(self._raw, 'wb', preset=self.level)
+
+    def _close_part(self):
+        """Finish the compressed stream and close the raw file"""
+        try:
+            if self._stream is not None:
+                self._stream.close()
+        finally:
+            self._raw.close()
+
+    def _sync_part(self):
+        """Finish the compressed stream and flush the raw file to disk"""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+            self._pending = 0
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._synced_size = self._raw.tell()
+
+    def _run(self):
+        """Writer thread: compress queued chunks until the end marker"""
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            if self.error is not None:
+                if data is self._synced:
+                    data.set()
+                continue  # Keep draining so write() never blocks
+
+            try:
+                if data is self._synced:
+                    self._sync_part()
+                    data.set()
+                    continue
+
+                if self.max_size is not None and self._written:
+                    # The raw size is only flushed to exactness when the worst-case
+                    # compressed size of the pending input could cross the limit
+                    if self._raw.tell() + self._compressed_bound(self._pending + len(data)) > self.max_size:
+                        self._flush_stream()
+                        room = self.max_size - self._raw.tell()
+                        if (self._compressed_bound(len(data)) > room
+                                or room < self.max_size // self.MIN_ROOM_DIVISOR):
+                            self._close_part()
+                            self._open_part(self.next_filename())
+
+                if self._stream is None:
+                    self._open_stream()
+
+                self._stream.write(data)
+                self._pending += len(data)
+                self._written = True
+            except Exception as e:
+                self.error = e
+                self._synced.set()
+
+    def write(self, data):
+        """Queue encoded bytes for compression"""
+        if self.error is not None:
+            raise self.error
+        self._queue.put(data)
+
+    def sync(self):
+        """Write out everything queued as complete compressed data on disk
+
+        Returns the size of the current part's file; it stays a valid
+        compressed file if truncated there, so a resumed run can append.
+        """
+        if self.error is not None:
+            raise self.error
+        self._synced.clear()
+        self._queue.put(self._synced)
+        self._synced.wait()
+        if self.error is not None:
+            raise self.error
+        return self._synced_size
+
+    def close(self):
+        """Flush everything still queued and close the current part"""
+        if self.closed:
+            return
+        self.closed = True
+
+        self._queue.put(None)
+        self._thread.join()
+        try:
+            self._close_part()
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+
+        if self.error is not None:
+            raise self.error
@@ -3,41 +3,111 @@ Data file loading utilities
 """
 
 import os
+import threading
+
+from .rule_engine import ManglingRules
+from .wordlist import MappedWordlist
 
 class DataLoader:
-    def __init__(self):
-        self.common_passwords = self.load_data_file("common_passwords.txt")
-        self.common_patterns = self.load_data_file("common_patterns.txt")
-        self.common_words = self.load_data_file("common_words.txt")
+    DATA_FILES = ("common_passwords.txt", "common_patterns.txt", "common_words.txt")
+
+    # Parsed data files shared by every DataLoader in the process, keyed by
+    # (path, mtime, size) so an edited file is read again. The lists are
+    # shared, so treat them as read-only.
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, passwords_file=None, patterns_file=None, words_file=None):
+        """Load the bundled data files, or map custom wordlists in their place
+
+        Custom wordlists can be any size: they are memory-mapped and read
+        lazily (see MappedWordlist) instead of being loaded into lists.
+        Bundled files are located once and parsed once per process.
+        """
+        custom_paths = dict(zip(self.DATA_FILES, (passwords_file, patterns_file, words_file)))
+        # filename -> resolved path (None if missing), and -> status of its load
+        self.file_paths = {}
+        self.file_status = {}
+
+        self.common_passwords = self._load_list("common_passwords.txt", custom_paths)
+        self.common_patterns = self._load_list("common_patterns.txt", custom_paths)
+        self.common_words = self._load_list("common_words.txt", custom_paths)
+
+        rules = self._load_cached(ManglingRules.FILENAME, lambda lines: ManglingRules(lines) if lines else None)
+        self.mangling_rules = rules or ManglingRules.default()
+
+    def _load_list(self, filename, custom_paths):
+        """Return a bundled data list, or a custom wordlist if one is given"""
+        custom_path = custom_paths[filename]
+        if custom_path:
+            self.file_paths[filename] = custom_path
+            self.file_status[filename] = "custom"
+            return self.load_wordlist(custom_path)
+        return self.load_data_file(filename)
+
+    @staticmethod
+    def load_wordlist(file_path):
+        """Memory-map a wordlist of any size, one entry per line"""
+        return MappedWordlist(file_path)
+
+    @staticmethod
+    def resolve_path(filename):
+        """Find a data file next to the program, in the working directory or in data/
+
+        Returns None if it is in none of them.
+        """
+        script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for file_path in (os.path.join(script_dir, filename), filename,
+                          os.path.join(script_dir, "data", filename)):
+            if os.path.isfile(file_path):
+                return file_path
+        return None
+
+    @staticmethod
+    def _read_lines(file_path):
+        """Read a data file's entries, skipping blank lines and comments"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            # Read lines, strip whitespace, and filter out empty lines
+            lines = [line.strip() for line in f]
+        return [line for line in lines if line and not line.startswith('#')]
+
+    def _load_cached(self, filename, parse=None):
+        """Resolve, read and parse a data file, reusing an earlier parse of the unchanged file
+
+        Returns None (after recording why) if the file is missing or unreadable.
+        """
+        file_path = self.resolve_path(filename)
+        self.file_paths[filename] = file_path
+        if file_path is None:
+            self.file_status[filename] = "missing"
+            return None
+
+        with self._cache_lock:
+            try:
+                stat = os.stat(file_path)
+                key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+                entry = self._cache.get(key)
+                if entry is None:
+                    lines = self._read_lines(file_path)
+            except Exception as e:
+                print(f"Warning: Could not load {filename}: {e}")
+                self.file_status[filename] = "error"
+                return None
+
+            if entry is None:
+                # Parse errors (e.g. a malformed rules file) are not hidden behind fallback data
+                entry = self._cache[key] = (lines, parse(lines) if parse else lines)
+
+        self.file_status[filename] = len(entry[0])
+        return entry[1]
 
     def load_data_file(self, filename):
         """Load data from a text file, return list of lines"""
-        try:
-            # Try to load from same directory as script
-            script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            file_path = os.path.join(script_dir, filename)
-
-            if not os.path.exists(file_path):
-                # Try current working directory
-                file_path = filename
-
-            if not os.path.exists(file_path):
-                # Try data subdirectory
-                data_dir = os.path.join(script_dir, "data")
-                file_path = os.path.join(data_dir, filename)
-
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    # Read lines, strip whitespace, and filter out empty lines
-                    lines = [line.strip() for line in f.readlines()]
-                    return [line for line in lines if line and not line.startswith('#')]
-            else:
-                # Return fallback data if file not found
-                return self.get_fallback_data(filename)
-
-        except Exception as e:
-            print(f"Warning: Could not load {filename}: {e}")
+        lines = self._load_cached(filename)
+        if lines is None:
+            # Return fallback data if file not found
             return self.get_fallback_data(filename)
+        return lines
 
     def get_fallback_data(self, filename):
         """Return minimal fallback data if files can't be loaded"""
@@ -60,28 +130,18 @@ class DataLoader:
         return []
 
     def check_data_files(self):
-        """Check if all data files are present and show status"""
+        """Show the status of each data file as it was loaded"""
         files_status = []
-        required_files = ["common_passwords.txt", "common_patterns.txt", "common_words.txt"]
-
-        for filename in required_files:
-            script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            file_path = os.path.join(script_dir, filename)
-
-            if not os.path.exists(file_path):
-                file_path = filename
-            if not os.path.exists(file_path):
-                data_dir = os.path.join(script_dir, "data")
-                file_path = os.path.join(data_dir, filename)
-
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        lines = len([line for line in f.readlines() if line.strip() and not line.strip().startswith('#')])
-                    files_status.append(f"✅ {filename}: {lines} entries loaded")
-                except:
-                    files_status.append(f"⚠️ {filename}: Found but error reading")
-            else:
+
+        for filename in self.DATA_FILES + (ManglingRules.FILENAME,):
+            status = self.file_status.get(filename)
+            if status == "custom":
+                files_status.append(f"✅ {filename}: using {self.file_paths[filename]} (memory-mapped)")
+            elif status == "error":
+                files_status.append(f"⚠️ {filename}: Found but error reading")
+            elif status == "missing":
                 files_status.append(f"❌ {filename}: Not found (using fallback data)")
+            else:
+                files_status.append(f"✅ {filename}: {status} entries loaded")
 
         return files_status
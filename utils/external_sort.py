@@ -0,0 +1,121 @@
+"""
+Disk-backed sorting and deduplication for candidate streams larger than RAM
+"""
+
+import heapq
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+_ESCAPE = re.compile(r'\\(.)', re.DOTALL)
+
+def _escape(item):
+    """Make an item fit on one line of a run file"""
+    if '\\' in item or '\n' in item:
+        return item.replace('\\', '\\\\').replace('\n', '\\n')
+    return item
+
+def _unescape(line):
+    """Undo _escape on a run file line (without its newline)"""
+    if '\\' in line:
+        return _ESCAPE.sub(lambda match: '\n' if match.group(1) == 'n' else match.group(1), line)
+    return line
+
+class ExternalDeduplicator:
+    DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024  # 256MB
+    MAX_MERGE_FANIN = 64  # Sorted runs opened at once during a merge pass
+    SET_ENTRY_OVERHEAD = 32  # Approximate per-entry cost of the in-memory set
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, temp_dir=None):
+        self.memory_budget = memory_budget
+        self.temp_dir = temp_dir
+        self.status_callback = None
+        self.run_count = 0
+
+    def set_status_callback(self, callback):
+        """Set callback function for status updates"""
+        self.status_callback = callback
+
+    def _update_status(self, message):
+        """Update status if callback is set"""
+        if self.status_callback:
+            self.status_callback(message)
+
+    def unique_sorted(self, items):
+        """Yield the distinct items in sorted order using bounded memory
+
+        Items are collected in a set until the memory budget is reached, then
+        spilled to disk as a sorted run. The runs are k-way merged at the end
+        and duplicates across runs are dropped during the merge. Items may
+        contain newlines (e.g. multi-line CSV cells); they are escaped in the
+        run files.
+        """
+        work_dir = tempfile.mkdtemp(prefix="passcodes_dedup_", dir=self.temp_dir)
+        try:
+            runs = []
+            pending = set()
+            pending_bytes = 0
+
+            for item in items:
+                if item in pending:
+                    continue
+                pending.add(item)
+                pending_bytes += sys.getsizeof(item) + self.SET_ENTRY_OVERHEAD
+
+                if pending_bytes >= self.memory_budget:
+                    runs.append(self._write_run(sorted(pending), work_dir, len(runs)))
+                    pending.clear()
+                    pending_bytes = 0
+
+            # Everything fit in memory: no disk round trip needed
+            if not runs:
+                self.run_count = 0
+                yield from sorted(pending)
+                return
+
+            if pending:
+                runs.append(self._write_run(sorted(pending), work_dir, len(runs)))
+                pending.clear()
+
+            self.run_count = len(runs)
+            self._update_status(f"Merging {len(runs)} sorted runs from disk...")
+
+            # Reduce the number of runs until they can be merged in one pass
+            while len(runs) > self.MAX_MERGE_FANIN:
+                group, runs = runs[:self.MAX_MERGE_FANIN], runs[self.MAX_MERGE_FANIN:]
+                merged = self._write_run(self._merge_runs(group), work_dir, f"m{len(runs)}_{self.run_count}")
+                for path in group:
+                    os.remove(path)
+                runs.append(merged)
+                self.run_count += 1
+
+            yield from self._merge_runs(runs)
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _write_run(self, sorted_items, work_dir, run_id):
+        """Write sorted items to a run file, one escaped item per line, and return its path"""
+        path = os.path.join(work_dir, f"run_{run_id}.txt")
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            for item in sorted_items:
+                f.write(_escape(item))
+                f.write("\n")
+        return path
+
+    def _merge_runs(self, paths):
+        """Yield the distinct items of several sorted run files in order"""
+        files = [open(path, 'r', encoding='utf-8', newline='\n') for path in paths]
+        try:
+            # Compare the original items so the merge order matches sorted()
+            streams = [(_unescape(line[:-1]) for line in f) for f in files]
+            previous = None
+            for item in heapq.merge(*streams):
+                if item != previous:
+                    previous = item
+                    yield item
+        finally:
+            for f in files:
+                f.close()
@@ -2,11 +2,29 @@
 File management utilities for saving and splitting large files
 """
 
+import bz2
+import gzip
+import lzma
 import os
+import sys
+
+from .stream_utils import StreamUtils, GenerationCancelled
+from .compressed_writer import CompressedWriter
 
 class FileManager:
+    MAX_FILE_SIZE = 1024 * 1024 * 1024  # 1GB in bytes
+    WRITE_BUFFER_SIZE = 4 * 1024 * 1024
+    READ_CHUNK_SIZE = 8 * 1024 * 1024
+    OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
     def __init__(self):
         self.status_callback = None
+        self.cancel_event = None
+        self.written_count = 0
+        self.compression = None
+        self.compression_level = None
+        self.split_on_compressed = False
+        self.batch_callback = None
 
     def set_status_callback(self, callback):
         """Set callback function for status updates"""
@@ -17,62 +35,261 @@ class FileManager:
         if self.status_callback:
             self.status_callback(message)
 
-    def save_with_splitting(self, passcodes, base_filename, delimiter, file_extension):
-        """Save passcodes to files, splitting if larger than 1GB"""
-        max_file_size = 1024 * 1024 * 1024  # 1GB in bytes
-        file_count = 1
-        current_size = 0
-        current_file = None
-        files_created = []
+    def set_cancel_event(self, cancel_event):
+        """Set a threading.Event that stops writing when set"""
+        self.cancel_event = cancel_event
 
-        try:
-            # Create first file
-            if len(passcodes) > 1000000:  # If more than 1M passcodes, expect multiple files
-                filename = f"{base_filename}_part{file_count}{file_extension}"
-            else:
-                filename = f"{base_filename}{file_extension}"
+    def set_batch_callback(self, callback):
+        """Call callback(written_count) after each batch that more passcodes follow
+
+        Used for checkpoints; while it is set, parts are kept on errors so
+        an interrupted run can be resumed.
+        """
+        self.batch_callback = callback
+
+    @staticmethod
+    def format_size(num_bytes):
+        """Format a byte count for display, e.g. 1.5 GB"""
+        size = float(num_bytes)
+        for unit in ["bytes", "KB", "MB", "GB"]:
+            if size < 1024 or unit == "GB":
+                break
+            size /= 1024
+        if unit == "bytes":
+            return f"{num_bytes:,} bytes"
+        if size >= 1024:
+            return f"{size / 1024:,.1f} TB"
+        return f"{size:,.1f} {unit}"
+
+    def set_compression(self, compression=None, level=None, split_on_compressed=False):
+        """Compress output with "gzip", "bz2" or "xz" (None writes plain text)
+
+        Parts are split on uncompressed size unless split_on_compressed is
+        set, in which case a part is closed before its compressed size
+        would pass the limit, allowing for the codec's worst-case overhead
+        (it may fall short by up to one write batch or 1/64 of the limit).
+        """
+        if compression is not None:
+            CompressedWriter.check_level(compression, level)
+        self.compression = compression
+        self.compression_level = level
+        self.split_on_compressed = split_on_compressed
+
+    def save_with_splitting(self, passcodes, base_filename, delimiter, file_extension, resume=None):
+        """Save passcodes to files, splitting if larger than 1GB
 
-            current_file = open(filename, 'w', encoding='utf-8')
-            files_created.append(filename)
+        passcodes may be a list or any iterable; iterables are consumed
+        lazily so the full wordlist never has to be held in memory.
+        Candidates are encoded a batch at a time and written with large
+        buffered writes; only a batch that crosses the size limit is
+        measured item by item to find the split point. With compression
+        enabled the compression extension is appended to file_extension.
+        resume is a state returned by sync_output(), after
+        restore_output(); the parts it lists are kept and the last one is
+        appended to.
+        """
+        max_file_size = self.MAX_FILE_SIZE
+        if self.compression:
+            file_extension += CompressedWriter.EXTENSIONS[self.compression]
+            if self.split_on_compressed:
+                # The writer thread splits on compressed size instead
+                max_file_size = sys.maxsize
+        self.file_count = 1
+        self.current_size = 0
+        self.current_file = None
+        self.files_created = []
+        self.written_count = 0
+        delimiter_size = len(delimiter.encode('utf-8'))
 
-            for i, passcode in enumerate(passcodes):
-                # Use delimiter instead of always newline
-                if i == len(passcodes) - 1:  # Last item
-                    line = passcode  # No delimiter after last item
+        # Sized inputs keep the up-front naming; streams are renamed on first split
+        total = len(passcodes) if hasattr(passcodes, '__len__') else None
+
+        try:
+            if resume is not None:
+                self._resume_output(resume, base_filename, file_extension)
+
+            batches = StreamUtils.batched(passcodes, StreamUtils.DEFAULT_BATCH_SIZE)
+            for batch, is_last_batch in StreamUtils.mark_last(batches):
+                # Check for cancellation and update progress once per batch
+                if self.cancel_event is not None and self.cancel_event.is_set():
+                    raise GenerationCancelled("Generation cancelled")
+                if total is not None:
+                    self._update_status(f"Writing passcode {self.written_count+1:,} of {total:,}...")
                 else:
-                    line = passcode + delimiter
+                    self._update_status(f"Writing passcode {self.written_count+1:,}...")
 
-                line_size = len(line.encode('utf-8'))
+                if self.current_file is None:
+                    # Create first file
+                    if total is not None and total > 1000000:  # If more than 1M passcodes, expect multiple files
+                        filename = f"{base_filename}_part{self.file_count}{file_extension}"
+                    else:
+                        filename = f"{base_filename}{file_extension}"
+                    self._open_output(filename, base_filename, file_extension)
 
-                # Check if adding this line would exceed 1GB
-                if current_size + line_size > max_file_size and current_size > 0:
-                    # Close current file and start new one
-                    current_file.close()
-                    file_count += 1
-                    filename = f"{base_filename}_part{file_count}{file_extension}"
-                    current_file = open(filename, 'w', encoding='utf-8')
-                    files_created.append(filename)
-                    current_size = 0
+                # Use delimiter instead of always newline, with no delimiter after the last item
+                data = delimiter.join(batch)
+                if not is_last_batch:
+                    data += delimiter
+                data = data.encode('utf-8')
+
+                if self.current_size + len(data) <= max_file_size:
+                    self._write_output(data)
+                else:
+                    # The batch crosses the 1GB limit; place the split using per-item offsets
+                    offset = 0
+                    for j, passcode in enumerate(batch):
+                        line_size = len(passcode.encode('utf-8'))
+                        if not (is_last_batch and j == len(batch) - 1):
+                            line_size += delimiter_size
 
-                current_file.write(line)
-                current_size += line_size
+                        if self.current_size + line_size > max_file_size and self.current_size > 0:
+                            self._start_next_part(base_filename, file_extension)
 
-                # Update progress every 10000 lines
-                if i % 10000 == 0:
-                    self._update_status(f"Writing passcode {i+1:,} of {len(passcodes):,}...")
+                        self._write_output(data[offset:offset + line_size])
+                        offset += line_size
 
-            if current_file:
-                current_file.close()
+                self.written_count += len(batch)
+                if self.batch_callback is not None and not is_last_batch:
+                    self.batch_callback(self.written_count)
 
-            return files_created
+            if self.current_file:
+                self.current_file.close()
+
+            return self.files_created
 
         except Exception as e:
-            if current_file:
-                current_file.close()
+            if self.current_file:
+                try:
+                    self.current_file.close()
+                except Exception:
+                    pass
+            if self.batch_callback is not None:
+                # Keep the parts for a resumed run
+                raise e
             # Clean up any files that were created
-            for file in files_created:
+            for file in self.files_created:
                 try:
                     os.remove(file)
                 except:
                     pass
             raise e
+
+    def _open_output(self, filename, base_filename, file_extension, append=False):
+        """Open an output part for large buffered binary writes"""
+        if not append:
+            self.files_created.append(filename)
+            self.current_size = 0
+
+        if not self.compression:
+            self.current_file = open(filename, 'ab' if append else 'wb', buffering=self.WRITE_BUFFER_SIZE)
+            return
+
+        max_size = None
+        if self.split_on_compressed:
+            max_size = self.MAX_FILE_SIZE
+        self.current_file = CompressedWriter(
+            filename, self.compression, self.compression_level, max_size,
+            lambda: self._add_next_part(base_filename, file_extension), append
+        )
+
+    def sync_output(self):
+        """Flush the current part to disk and return the state a resumed save needs"""
+        if self.compression:
+            disk_size = self.current_file.sync()
+        else:
+            self.current_file.flush()
+            os.fsync(self.current_file.fileno())
+            disk_size = self.current_file.tell()
+
+        return {
+            'files': list(self.files_created),
+            'file_count': self.file_count,
+            'current_size': self.current_size,
+            'disk_size': disk_size,
+            'written_count': self.written_count
+        }
+
+    def restore_output(self, resume, base_filename, file_extension):
+        """Put the parts of an interrupted save back as they were at a sync_output() state
+
+        Anything written after that point is cut off, and parts started
+        after it are removed, since they will be written again.
+        """
+        if self.compression:
+            file_extension += CompressedWriter.EXTENSIONS[self.compression]
+        files = resume['files']
+        filename = files[-1]
+
+        # A split after the checkpoint may have renamed the lone first file
+        first_part = f"{base_filename}_part1{file_extension}"
+        if len(files) == 1 and not os.path.exists(filename) and os.path.exists(first_part):
+            os.replace(first_part, filename)
+        for file in files:
+            if not os.path.exists(file):
+                raise FileNotFoundError(f"Cannot resume: {file} is missing")
+
+        part = resume['file_count'] + 1
+        while os.path.exists(f"{base_filename}_part{part}{file_extension}"):
+            os.remove(f"{base_filename}_part{part}{file_extension}")
+            part += 1
+
+        os.truncate(filename, resume['disk_size'])
+
+    def _resume_output(self, resume, base_filename, file_extension):
+        """Reopen the last part of an interrupted save for appending"""
+        self.files_created = list(resume['files'])
+        self.file_count = resume['file_count']
+        self.written_count = resume['written_count']
+        self._open_output(self.files_created[-1], base_filename, file_extension, append=True)
+        self.current_size = resume['current_size']
+
+    def read_passcodes(self, filenames, delimiter):
+        """Yield the passcodes saved in output parts, decompressing as needed
+
+        Passcodes that contain the delimiter itself are not recovered intact.
+        """
+        newline = '' if os.linesep == '\n' else None
+        for filename in filenames:
+            if self.compression:
+                f = self.OPENERS[self.compression](filename, 'rt', encoding='utf-8', newline=newline)
+            else:
+                f = open(filename, 'r', encoding='utf-8', newline=newline)
+
+            with f:
+                pending = ""
+                while True:
+                    chunk = f.read(self.READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    *passcodes, pending = (pending + chunk).split(delimiter)
+                    yield from passcodes
+                if pending:
+                    yield pending
+
+    def _write_output(self, data):
+        """Write encoded bytes to the current part, tracking its logical size"""
+        self.current_size += len(data)
+        if os.linesep != '\n':
+            # Match the newline translation of text-mode files
+            data = data.replace(b'\n', os.linesep.encode('utf-8'))
+        self.current_file.write(data)
+
+    def _next_part_name(self, base_filename, file_extension):
+        """Number the next part, renaming a lone first file to _part1"""
+        if self.file_count == 1 and self.files_created[0] == f"{base_filename}{file_extension}":
+            first_part = f"{base_filename}_part1{file_extension}"
+            os.replace(self.files_created[0], first_part)
+            self.files_created[0] = first_part
+        self.file_count += 1
+        return f"{base_filename}_part{self.file_count}{file_extension}"
+
+    def _add_next_part(self, base_filename, file_extension):
+        """Name and record the next part for a writer that splits itself"""
+        filename = self._next_part_name(base_filename, file_extension)
+        self.files_created.append(filename)
+        return filename
+
+    def _start_next_part(self, base_filename, file_extension):
+        """Close the current file and start the next numbered part"""
+        self.current_file.close()
+        self._open_output(self._next_part_name(base_filename, file_extension), base_filename, file_extension)
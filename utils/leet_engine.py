@@ -0,0 +1,105 @@
+"""
+Leetspeak expansion: partial substitutions from a multi-choice table
+"""
+
+from itertools import combinations, product
+
+class LeetExpander:
+    """Enumerate leetspeak variants of a word with a bounded number of substitutions
+
+    Each table entry maps a lowercase character to its replacements, e.g.
+    's' -> ('5', '$'); uppercase characters use the same entry. expand()
+    yields every variant with 1 to max_substitutions characters replaced,
+    fewest substitutions first, then the fully substituted word with each
+    character's first replacement (what TextUtils.to_leetspeak gives) if
+    that needs more substitutions than the cap allows.
+    """
+
+    DEFAULT_TABLE = {
+        'a': ('4', '@'), 'e': ('3',), 'i': ('1', '!'), 'o': ('0',),
+        's': ('5', '$'), 't': ('7',), 'l': ('1',), 'g': ('9',)
+    }
+    DEFAULT_MAX_SUBSTITUTIONS = 3
+
+    def __init__(self, table=None, max_substitutions=DEFAULT_MAX_SUBSTITUTIONS):
+        if max_substitutions < 0:
+            raise ValueError("Maximum leetspeak substitutions cannot be negative!")
+        self.max_substitutions = max_substitutions
+        self.table = {}
+        for char, replacements in (self.DEFAULT_TABLE if table is None else table).items():
+            if len(char) != 1:
+                raise ValueError(f"Leetspeak table keys are single characters, got '{char}'")
+            # Repeated replacements, or ones equal to the character itself, substitute nothing new
+            choices = tuple(dict.fromkeys(r for r in replacements if r and r != char.lower()))
+            if choices:
+                self.table[char.lower()] = choices
+
+        # Single-character replacements can never turn two substitution sets into the same string
+        self._needs_dedup = any(len(r) != 1 for choices in self.table.values() for r in choices)
+
+    @classmethod
+    def parse_table(cls, lines):
+        """Parse table lines of the form 'a 4 @' (a character, then its replacements)"""
+        table = {}
+        for line in lines:
+            parts = line.split()
+            if not parts or parts[0].startswith('#'):
+                continue
+            if len(parts) < 2:
+                raise ValueError(f"Leetspeak table line '{line.strip()}' has no replacements")
+            table.setdefault(parts[0], ())
+            table[parts[0]] += tuple(parts[1:])
+        return table
+
+    def _choices(self, char):
+        """Replacements for a character in the word (the table is keyed by lowercase)"""
+        choices = self.table.get(char)
+        if choices is None:
+            choices = self.table.get(char.lower(), ())
+        return choices
+
+    def positions(self, word):
+        """Return (index, replacements) for every substitutable character of word"""
+        positions = []
+        for index, char in enumerate(word):
+            choices = tuple(r for r in self._choices(char) if r != char)
+            if choices:
+                positions.append((index, choices))
+        return positions
+
+    def expand(self, word):
+        """Lazily yield the distinct leetspeak variants of word, never the word itself"""
+        positions = self.positions(word)
+        if not positions or not self.max_substitutions:
+            return iter(())
+        variants = self._iter_variants(word, positions)
+        if self._needs_dedup:
+            return self._unique(word, variants)
+        return variants
+
+    def _iter_variants(self, word, positions):
+        chars = list(word)
+        limit = min(self.max_substitutions, len(positions))
+        for count in range(1, limit + 1):
+            for chosen in combinations(positions, count):
+                indexes = [index for index, _ in chosen]
+                for replacements in product(*(choices for _, choices in chosen)):
+                    for index, replacement in zip(indexes, replacements):
+                        chars[index] = replacement
+                    yield ''.join(chars)
+                for index in indexes:
+                    chars[index] = word[index]
+
+        if len(positions) > limit:
+            for index, choices in positions:
+                chars[index] = choices[0]
+            yield ''.join(chars)
+
+    @staticmethod
+    def _unique(word, variants):
+        """Skip repeats (and the word itself), which multi-character replacements can produce"""
+        seen = {word}
+        for variant in variants:
+            if variant not in seen:
+                seen.add(variant)
+                yield variant
@@ -3,12 +3,94 @@ Password filtering utilities for removing duplicates from previous files
 """
 
 import os
+import re
 import csv
-from typing import Set, List
+import multiprocessing
+import glob
+import hashlib
+import json
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+from typing import Set, List, Iterable, Iterator, Container, Optional
+
+from .external_sort import ExternalDeduplicator
+from .password_index import PasswordIndex
+
+# Skip obvious metadata
+_METADATA_INDICATORS = frozenset([
+    'password', 'username', 'email', 'login', 'account',
+    'created', 'modified', 'length', 'strength', 'type',
+    'id', 'name', 'description', 'category', 'url', 'website'
+])
+
+# Common date patterns, compiled once: YYYY-MM-DD, MM/DD/YYYY, MM-DD-YYYY, YYYY/MM/DD
+_DATE_PATTERN = re.compile(r'^(?:\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}-\d{2}-\d{4}|\d{4}/\d{2}/\d{2})$')
+
+_TEXT_DELIMITERS = (',', ';', '\t', '|')
+
+def _is_likely_metadata(text):
+    """Check if text is likely metadata rather than a password"""
+    # Skip if it's exactly a metadata word
+    if text.lower().strip() in _METADATA_INDICATORS:
+        return True
+
+    # Skip if it looks like a date
+    if _DATE_PATTERN.match(text.strip()):
+        return True
+
+    # Skip if it's very long (likely not a password)
+    if len(text) > 100:
+        return True
+
+    return False
+
+def _iter_text_line_passwords(lines):
+    """Yield passwords from text lines (one per line or delimited)"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Split on the first common delimiter the line contains
+        for delimiter in _TEXT_DELIMITERS:
+            if delimiter in line:
+                for part in line.split(delimiter):
+                    part = part.strip()
+                    if part and not _is_likely_metadata(part):
+                        yield part
+                break
+        else:
+            # Single password per line
+            if not _is_likely_metadata(line):
+                yield line
+
+def _parse_text_chunk(task):
+    """Process-pool worker: parse the passwords in one newline-aligned byte range"""
+    file_path, start, end = task
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    # Same decoding and universal-newline handling as reading in text mode
+    text = data.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+    return list(dict.fromkeys(_iter_text_line_passwords(text.split('\n'))))
 
 class PasswordFilter:
-    def __init__(self):
+    PARSER_VERSION = 1  # Bump whenever parsing rules change so cached indexes are rebuilt
+    CHUNK_SIZE = 8 * 1024 * 1024  # Bytes of text parsed per worker task
+    PARALLEL_MIN_SIZE = 32 * 1024 * 1024  # Smaller files are not worth a process pool
+    SET_CACHE_MAGIC = b"PWSET3"
+    SET_CACHE_COUNT = struct.Struct("<Q")
+
+    def __init__(self, cache_dir: str = None, use_cache: bool = False, workers: int = 1):
+        # Caching is opt-in: it keeps a copy of the parsed passwords in cache_dir
         self.status_callback = None
+        self.cache_dir = cache_dir or self.default_cache_dir()
+        self.use_cache = use_cache
+        self.workers = workers
 
     def set_status_callback(self, callback):
         """Set callback function for status updates"""
@@ -25,18 +107,17 @@ class PasswordFilter:
             return set()
 
         passwords = set()
-        file_extension = os.path.splitext(file_path)[1].lower()
 
         try:
             self._update_status(f"Loading previous passwords from {os.path.basename(file_path)}...")
 
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                if file_extension == '.csv':
-                    passwords.update(self._load_csv_passwords(f))
-                elif file_extension == '.tsv':
-                    passwords.update(self._load_tsv_passwords(f))
-                else:
-                    passwords.update(self._load_text_passwords(f))
+            # Parse once into the cache; later loads decode the cached set in bulk
+            cached = self._read_cached_set(file_path)
+            if cached is not None:
+                passwords = cached
+            else:
+                passwords.update(self.iter_previous_passwords(file_path))
+                self._write_cached_set(file_path, passwords)
 
             self._update_status(f"Loaded {len(passwords):,} previous passwords for exclusion")
             return passwords
@@ -45,10 +126,217 @@ class PasswordFilter:
             self._update_status(f"Warning: Could not load previous passwords: {str(e)}")
             return set()
 
-    def _load_csv_passwords(self, file_handle) -> Set[str]:
-        """Load passwords from CSV file"""
-        passwords = set()
+    def build_previous_index(self, file_path: str, index_path: str,
+                             memory_budget: int = ExternalDeduplicator.DEFAULT_MEMORY_BUDGET) -> PasswordIndex:
+        """Compile a previous file into an on-disk sorted index and open it
+
+        Parsing streams through an external sort, so the file never has to
+        fit in memory.
+        """
+        self._update_status(f"Indexing previous passwords from {os.path.basename(file_path)}...")
+
+        deduplicator = ExternalDeduplicator(memory_budget)
+        deduplicator.set_status_callback(self.status_callback)
+        count = PasswordIndex.build(deduplicator.unique_sorted(self.iter_previous_passwords(file_path)), index_path)
+
+        self._update_status(f"Indexed {count:,} previous passwords for exclusion")
+        return PasswordIndex(index_path)
+
+    def open_previous_index(self, file_path: str, index_path: str = None) -> PasswordIndex:
+        """Open a password index, compiling it from file_path first if needed
+
+        file_path may itself be an index. Without index_path the shared cache
+        is used (or <file>.pwindex when caching is off); an explicit
+        index_path is reused unless the source file is newer.
+        """
+        if not os.path.isfile(file_path):
+            raise ValueError(f"Previous password file not found: {file_path}")
+        if PasswordIndex.is_index_file(file_path):
+            return PasswordIndex(file_path)
+
+        if index_path is None:
+            index = self.get_cached_index(file_path)
+            if index is not None:
+                self._update_status(f"Using {len(index):,} indexed previous passwords for exclusion")
+                return index
+            index_path = file_path + ".pwindex"
+
+        if (PasswordIndex.is_index_file(index_path)
+                and os.path.getmtime(index_path) >= os.path.getmtime(file_path)):
+            index = PasswordIndex(index_path)
+            self._update_status(f"Using {len(index):,} indexed previous passwords for exclusion")
+            return index
+
+        return self.build_previous_index(file_path, index_path)
+
+    @staticmethod
+    def default_cache_dir() -> str:
+        """Return the per-user directory for compiled exclusion indexes"""
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return os.path.join(cache_home, 'password-list-generator')
+
+    def _parser_name(self, file_path: str) -> str:
+        """Name of the parser used for a file, part of the cache key"""
+        file_extension = os.path.splitext(file_path)[1].lower()
+        return {'.csv': 'csv', '.tsv': 'tsv'}.get(file_extension, 'text')
+
+    def _cache_path(self, file_path: str, extension: str) -> str:
+        """Cache location for a file, keyed by path, size, mtime and parser options"""
+        stat = os.stat(file_path)
+        path_key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+        version = json.dumps([stat.st_size, stat.st_mtime_ns, self.PARSER_VERSION, self._parser_name(file_path)])
+        version_key = hashlib.sha1(version.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{path_key}_{version_key}.{extension}")
+
+    def cached_index_path(self, file_path: str) -> str:
+        """Cache location of the compiled index for a file"""
+        return self._cache_path(file_path, "pwindex")
+
+    def cached_set_path(self, file_path: str) -> str:
+        """Cache location of the parsed password set for a file"""
+        return self._cache_path(file_path, "pwset")
+
+    def _remove_stale_cache(self, cache_path: str):
+        """Drop cache files of the same kind compiled from older versions of the same file"""
+        path_prefix, extension = os.path.basename(cache_path).split('_')[0], os.path.splitext(cache_path)[1]
+        for stale_path in glob.glob(os.path.join(self.cache_dir, f"{path_prefix}_*{extension}")):
+            if stale_path != cache_path:
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+
+    def get_cached_index(self, file_path: str) -> Optional[PasswordIndex]:
+        """Open the cached index for a file, compiling it on a miss
+
+        Returns None when caching is disabled or the cache cannot be written.
+        """
+        if not self.use_cache:
+            return None
+
+        index_path = self.cached_index_path(file_path)
+        if PasswordIndex.is_index_file(index_path):
+            return PasswordIndex(index_path)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            index = self.build_previous_index(file_path, index_path)
+        except OSError as e:
+            self._update_status(f"Warning: Could not cache previous passwords: {str(e)}")
+            return None
+
+        self._remove_stale_cache(index_path)
+        return index
+
+    def _read_cached_set(self, file_path: str) -> Optional[Set[str]]:
+        """Load the cached password set for a file, or None on a miss
+
+        After the header the cache is zlib-compressed: the entry count, each
+        entry's length in characters (little-endian uint32) and then all
+        entries as one UTF-8 string. It decodes in one pass and holds any
+        password, multi-line CSV cells included. Anything that does not
+        decode cleanly is treated as a miss.
+        """
+        if not self.use_cache:
+            return None
+
+        try:
+            with open(self.cached_set_path(file_path), 'rb') as f:
+                data = f.read()
+            if not data.startswith(self.SET_CACHE_MAGIC):
+                return None
+            payload = zlib.decompress(data[len(self.SET_CACHE_MAGIC):])
+
+            count = self.SET_CACHE_COUNT.unpack_from(payload)[0]
+            lengths_end = self.SET_CACHE_COUNT.size + 4 * count
+            lengths = array('I')
+            lengths.frombytes(payload[self.SET_CACHE_COUNT.size:lengths_end])
+            if sys.byteorder == 'big':
+                lengths.byteswap()
+            text = payload[lengths_end:].decode('utf-8')
+        except (OSError, zlib.error, struct.error, ValueError):
+            return None
+
+        if len(lengths) != count or sum(lengths) != len(text):
+            return None
+        ends = list(accumulate(lengths))
+        return {text[end - length:end] for end, length in zip(ends, lengths)}
+
+    def _write_cached_set(self, file_path: str, passwords: Set[str]):
+        """Cache a parsed password set for _read_cached_set"""
+        if not self.use_cache:
+            return
+
+        lengths = array('I', map(len, passwords))
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+        payload = (self.SET_CACHE_COUNT.pack(len(passwords)) + lengths.tobytes()
+                   + ''.join(passwords).encode('utf-8'))
+
+        set_path = self.cached_set_path(file_path)
+        temp_path = set_path + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(self.SET_CACHE_MAGIC)
+                f.write(zlib.compress(payload, 1))
+            os.replace(temp_path, set_path)
+        except OSError as e:
+            self._update_status(f"Warning: Could not cache previous passwords: {str(e)}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        self._remove_stale_cache(set_path)
+
+    def iter_previous_passwords(self, file_path: str) -> Iterator[str]:
+        """Lazily yield the passwords parsed from a previous file (may repeat)"""
+        file_extension = os.path.splitext(file_path)[1].lower()
+
+        if (self._parser_name(file_path) == 'text' and self.workers > 1
+                and os.path.getsize(file_path) >= self.PARALLEL_MIN_SIZE):
+            yield from self._iter_text_passwords_parallel(file_path)
+            return
 
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            if file_extension == '.csv':
+                yield from self._iter_csv_passwords(f)
+            elif file_extension == '.tsv':
+                yield from self._iter_tsv_passwords(f)
+            else:
+                yield from self._iter_text_passwords(f)
+
+    def _iter_text_passwords_parallel(self, file_path: str) -> Iterator[str]:
+        """Yield passwords from a large text file, parsing chunks across processes"""
+        chunks = self._split_text_chunks(file_path)
+        self._update_status(f"Parsing {os.path.basename(file_path)} in {len(chunks)} chunks "
+                            f"with {self.workers} workers...")
+
+        with multiprocessing.Pool(processes=min(self.workers, len(chunks))) as pool:
+            for passwords in pool.imap(_parse_text_chunk, chunks):
+                yield from passwords
+
+    def _split_text_chunks(self, file_path: str) -> List[tuple]:
+        """Split a file into (path, start, end) byte ranges ending on line boundaries"""
+        file_size = os.path.getsize(file_path)
+        chunks = []
+        start = 0
+
+        with open(file_path, 'rb') as f:
+            while start < file_size:
+                # Extend each range to the end of the line it lands in
+                f.seek(min(start + self.CHUNK_SIZE, file_size))
+                f.readline()
+                end = min(f.tell(), file_size)
+                chunks.append((file_path, start, end))
+                start = end
+
+        return chunks
+
+    def _iter_csv_passwords(self, file_handle) -> Iterator[str]:
+        """Yield passwords from CSV file"""
         # Try to detect if file has headers
         sample = file_handle.read(1024)
         file_handle.seek(0)
@@ -71,13 +359,10 @@ class PasswordFilter:
             for cell in row:
                 cell = cell.strip()
                 if cell and not self._is_likely_metadata(cell):
-                    passwords.add(cell)
+                    yield cell
 
-        return passwords
-
-    def _load_tsv_passwords(self, file_handle) -> Set[str]:
-        """Load passwords from TSV file"""
-        passwords = set()
+    def _iter_tsv_passwords(self, file_handle) -> Iterator[str]:
+        """Yield passwords from TSV file"""
         reader = csv.reader(file_handle, delimiter='\t')
 
         for row_num, row in enumerate(reader):
@@ -90,36 +375,11 @@ class PasswordFilter:
             for cell in row:
                 cell = cell.strip()
                 if cell and not self._is_likely_metadata(cell):
-                    passwords.add(cell)
+                    yield cell
 
-        return passwords
-
-    def _load_text_passwords(self, file_handle) -> Set[str]:
-        """Load passwords from text file (one per line or delimited)"""
-        passwords = set()
-
-        for line_num, line in enumerate(file_handle):
-            line = line.strip()
-            if not line:
-                continue
-
-            # Try to detect common delimiters
-            if any(delimiter in line for delimiter in [',', ';', '\t', '|']):
-                # Line contains delimiters, split it
-                for delimiter in [',', ';', '\t', '|']:
-                    if delimiter in line:
-                        parts = line.split(delimiter)
-                        for part in parts:
-                            part = part.strip()
-                            if part and not self._is_likely_metadata(part):
-                                passwords.add(part)
-                        break
-            else:
-                # Single password per line
-                if not self._is_likely_metadata(line):
-                    passwords.add(line)
-
-        return passwords
+    def _iter_text_passwords(self, file_handle) -> Iterator[str]:
+        """Yield passwords from text file (one per line or delimited)"""
+        return _iter_text_line_passwords(file_handle)
 
     def _looks_like_header(self, row: List[str]) -> bool:
         """Check if a row looks like column headers"""
@@ -142,68 +402,35 @@ class PasswordFilter:
 
     def _is_likely_metadata(self, text: str) -> bool:
         """Check if text is likely metadata rather than a password"""
-        text_lower = text.lower().strip()
-
-        # Skip obvious metadata
-        metadata_indicators = [
-            'password', 'username', 'email', 'login', 'account',
-            'created', 'modified', 'length', 'strength', 'type',
-            'id', 'name', 'description', 'category', 'url', 'website'
-        ]
+        return _is_likely_metadata(text)
 
-        # Skip if it's exactly a metadata word
-        if text_lower in metadata_indicators:
-            return True
+    def filter_passwords(self, new_passwords: Iterable[str], previous_passwords: Container[str]) -> List[str]:
+        """Filter out passwords that exist in previous set, returning the unique rest
 
-        # Skip if it looks like a date
-        if self._looks_like_date(text):
-            return True
+        previous_passwords may be a set or an on-disk PasswordIndex.
+        """
+        return list(dict.fromkeys(self.filter_stream(new_passwords, previous_passwords)))
 
-        # Skip if it's very long (likely not a password)
-        if len(text) > 100:
-            return True
-
-        return False
+    def filter_stream(self, new_passwords: Iterable[str], previous_passwords: Container[str]) -> Iterator[str]:
+        """Lazily yield passwords that do not exist in previous set
 
-    def _looks_like_date(self, text: str) -> bool:
-        """Check if text looks like a date"""
-        import re
-
-        # Common date patterns
-        date_patterns = [
-            r'^\d{4}-\d{2}-\d{2}$',  # YYYY-MM-DD
-            r'^\d{2}/\d{2}/\d{4}$',  # MM/DD/YYYY
-            r'^\d{2}-\d{2}-\d{4}$',  # MM-DD-YYYY
-            r'^\d{4}/\d{2}/\d{2}$',  # YYYY/MM/DD
-        ]
-
-        for pattern in date_patterns:
-            if re.match(pattern, text.strip()):
-                return True
-
-        return False
-
-    def filter_passwords(self, new_passwords: List[str], previous_passwords: Set[str]) -> List[str]:
-        """Filter out passwords that exist in previous set"""
+        previous_passwords may be a set or an on-disk PasswordIndex.
+        """
         if not previous_passwords:
-            return new_passwords
+            yield from new_passwords
+            return
 
         self._update_status("Filtering out previous passwords...")
 
-        # Convert to set for faster lookup, then back to list
-        new_set = set(new_passwords)
-        original_count = len(new_set)
-
-        # Remove passwords that exist in previous set
-        filtered_set = new_set - previous_passwords
-
-        filtered_count = len(filtered_set)
-        removed_count = original_count - filtered_count
+        removed_count = 0
+        for password in new_passwords:
+            if password in previous_passwords:
+                removed_count += 1
+            else:
+                yield password
 
         self._update_status(f"Removed {removed_count:,} duplicate passwords from previous file")
 
-        return list(filtered_set)
-
     def get_file_stats(self, file_path: str) -> dict:
         """Get statistics about a password file"""
         if not file_path or not os.path.exists(file_path):
@@ -211,11 +438,13 @@ class PasswordFilter:
 
         try:
             file_size = os.path.getsize(file_path)
-            passwords = self.load_previous_passwords(file_path)
+
+            # Counting through the set cache also warms it for generation
+            password_count = len(self.load_previous_passwords(file_path))
 
             return {
                 'file_size': file_size,
-                'password_count': len(passwords),
+                'password_count': password_count,
                 'file_name': os.path.basename(file_path)
             }
         except:
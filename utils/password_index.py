@@ -0,0 +1,163 @@
+"""
+On-disk sorted password index for membership checks without loading the set
+"""
+
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+class PasswordIndex:
+    """Memory-mapped, sorted and deduplicated password list
+
+    File layout: header, UTF-8 password data, (count + 1) little-endian
+    uint64 offsets into the data, then a Bloom filter bit array. Lookups
+    check the Bloom filter first and binary search the offsets only when it
+    reports a possible match, so misses (the common case) never touch the
+    data section.
+    """
+    MAGIC = b"PWINDEX1"
+    HEADER = struct.Struct("<8sQQQQ")  # magic, count, offsets position, bloom position, bloom bits
+    OFFSET = struct.Struct("<Q")
+    BLOOM_BITS_PER_ENTRY = 10
+    BLOOM_HASHES = 4
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        self._file = open(index_path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{index_path} is not a password index")
+
+        if len(self._map) < self.HEADER.size or self._map[:len(self.MAGIC)] != self.MAGIC:
+            self.close()
+            raise ValueError(f"{index_path} is not a password index")
+
+        _, self.count, self._offsets_pos, self._bloom_pos, self._bloom_bits = self.HEADER.unpack_from(self._map, 0)
+
+    @classmethod
+    def is_index_file(cls, file_path):
+        """Check whether a file starts with the password index header"""
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read(len(cls.MAGIC)) == cls.MAGIC
+        except OSError:
+            return False
+
+    @classmethod
+    def build(cls, sorted_passwords, index_path):
+        """Write an index from passwords that are already sorted and unique
+
+        Streams the input, so it works for lists far larger than RAM when fed
+        from ExternalDeduplicator.unique_sorted. Returns the entry count.
+        """
+        temp_path = index_path + ".tmp"
+        offsets_file = tempfile.TemporaryFile()
+        try:
+            with open(temp_path, 'wb') as out:
+                out.write(b"\0" * cls.HEADER.size)
+
+                # Data section, with offsets spooled to a side file
+                position = 0
+                count = 0
+                offsets_file.write(cls.OFFSET.pack(0))
+                for password in sorted_passwords:
+                    data = password.encode('utf-8')
+                    out.write(data)
+                    position += len(data)
+                    offsets_file.write(cls.OFFSET.pack(position))
+                    count += 1
+
+                offsets_pos = cls.HEADER.size + position
+                offsets_file.seek(0)
+                shutil.copyfileobj(offsets_file, out)
+
+                bloom_pos = out.tell()
+                bloom_bits = max(64, count * cls.BLOOM_BITS_PER_ENTRY)
+                bloom_bits += -bloom_bits % 8
+                out.write(b"\0" * (bloom_bits // 8))
+
+                out.seek(0)
+                out.write(cls.HEADER.pack(cls.MAGIC, count, offsets_pos, bloom_pos, bloom_bits))
+
+            # Second pass over the mapped data to set the Bloom filter bits
+            with open(temp_path, 'r+b') as f:
+                with mmap.mmap(f.fileno(), 0) as mapped:
+                    data_start = cls.HEADER.size
+                    previous = 0
+                    for i in range(1, count + 1):
+                        end = cls.OFFSET.unpack_from(mapped, offsets_pos + i * cls.OFFSET.size)[0]
+                        for bit in cls._bloom_positions(mapped[data_start + previous:data_start + end], bloom_bits):
+                            mapped[bloom_pos + (bit >> 3)] |= 1 << (bit & 7)
+                        previous = end
+
+            os.replace(temp_path, index_path)
+            return count
+
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        finally:
+            offsets_file.close()
+
+    @classmethod
+    def _bloom_positions(cls, data, bloom_bits):
+        """Yield the Bloom filter bit positions for encoded password data"""
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(cls.BLOOM_HASHES):
+            yield (h1 + i * h2) % bloom_bits
+
+    def _entry(self, i):
+        """Return the encoded bytes of entry i"""
+        start, end = struct.unpack_from("<QQ", self._map, self._offsets_pos + i * self.OFFSET.size)
+        return self._map[self.HEADER.size + start:self.HEADER.size + end]
+
+    def __contains__(self, password):
+        if not self.count:
+            return False
+
+        data = password.encode('utf-8')
+
+        bloom = self._map
+        for bit in self._bloom_positions(data, self._bloom_bits):
+            if not bloom[self._bloom_pos + (bit >> 3)] >> (bit & 7) & 1:
+                return False
+
+        # UTF-8 byte order matches code point order, so the bytes are sorted too
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle) < data:
+                low = middle + 1
+            else:
+                high = middle
+        return low < self.count and self._entry(low) == data
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self._entry(i).decode('utf-8')
+
+    def close(self):
+        """Release the memory map and file handle"""
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,286 @@
+"""
+Per-stage metrics and optional profiling for the lazy generation pipeline
+"""
+
+import cProfile
+import json
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from itertools import islice
+
+class StageMetrics:
+    """Time, counts and memory of one pipeline stage"""
+
+    def __init__(self, name, kind):
+        # kind is "generator", "filter" (dedup, exclusion) or "output" (write)
+        self.name = name
+        self.kind = kind
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self.items_in = None
+        self.items_out = 0
+        # Generator candidates that survived deduplication, when it streams
+        self.unique_count = None
+        self.peak_memory = None
+        self.finished = False
+        self._window_wall = 0.0
+
+    @property
+    def duplicate_ratio(self):
+        """Share of candidates dropped: by deduplication for generators, by the stage itself for filters"""
+        if self.kind == "generator":
+            if self.unique_count is None or not self.items_out:
+                return None
+            return 1 - self.unique_count / self.items_out
+        if self.kind == "filter" and self.items_in:
+            return 1 - self.items_out / self.items_in
+        return None
+
+    def to_dict(self):
+        """Plain-data form used for callbacks and JSON reports"""
+        duplicate_ratio = self.duplicate_ratio
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'wall_time': round(self.wall_time, 6),
+            'cpu_time': round(self.cpu_time, 6),
+            'items_in': self.items_in,
+            'items_out': self.items_out,
+            'duplicate_ratio': round(duplicate_ratio, 6) if duplicate_ratio is not None else None,
+            'peak_memory': self.peak_memory
+        }
+
+class PipelineMetrics:
+    """Attribute the time of a lazy pipeline to the stage that is running
+
+    Every measured stream is pulled a batch at a time, noting when the pull
+    starts and ends, so each stage gets its own (exclusive) wall time even
+    though the stages interleave, without reading the clocks per item. CPU
+    time is read every CPU_WINDOW seconds and shared out by the wall time
+    each stage had in that window. The
+    consumer of the pipeline is the "write" stage; work by other threads
+    (compression) is added to it, work by worker processes is not counted.
+
+    A disabled instance passes streams through untouched, so the engine can
+    use one unconditionally. A batch_size of 1 pulls (and times) item by
+    item, for callers that must not read ahead of what has been consumed.
+    """
+
+    CPU_WINDOW = 0.05
+    DEFAULT_BATCH_SIZE = 1000
+    PIPELINE_STAGES = ("dedup", "exclusion", "write")
+
+    def __init__(self, enabled=True, track_memory=False, profile_stage=None, callback=None,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.track_memory = track_memory and enabled
+        self.profile_stage = profile_stage if enabled else None
+        self.callback = callback
+        self.stages = {}
+        self.profile = None
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self._profiler = cProfile.Profile() if self.profile_stage else None
+        self._profiling = False
+        self._started_tracing = False
+        self._counting_unique = False
+        self._source = None
+        self._stack = [self.stage("write", "output")]
+
+    def stage(self, name, kind):
+        """Return the metrics of a stage, creating them on first use"""
+        metrics = self.stages.get(name)
+        if metrics is None:
+            metrics = self.stages[name] = StageMetrics(name, kind)
+            if kind == "generator" and self._counting_unique:
+                metrics.unique_count = 0
+            if self.track_memory:
+                metrics.peak_memory = 0
+        return metrics
+
+    def start(self):
+        """Start the clocks; until finish() time is charged to the consumer ("write")"""
+        if not self.enabled:
+            return
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start_wall = self._last = self._window_start = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._thread_cpu = self._window_cpu = time.thread_time()
+        self._update_profiler()
+
+    def measure(self, name, items, kind="generator", count_unique=False):
+        """Wrap a stream so the time spent producing its items is charged to name
+
+        Generator streams mark themselves as the source of the items that
+        follow; a count_unique stream (streaming dedup) credits each item it
+        passes to that source, giving per-generator duplicate ratios.
+        """
+        if not self.enabled:
+            return items
+        self._counting_unique = self._counting_unique or count_unique
+        return self._measure(self.stage(name, kind), iter(items), kind == "generator", count_unique)
+
+    def _measure(self, stage, iterator, is_source, count_unique):
+        while True:
+            self._charge()
+            self._stack.append(stage)
+            if self._profiler:
+                self._update_profiler()
+            try:
+                batch = self._pull(iterator, count_unique)
+            finally:
+                self._charge()
+                self._stack.pop()
+                if self._profiler:
+                    self._update_profiler()
+
+            if not batch:
+                return
+            stage.items_out += len(batch)
+            if is_source:
+                # Generators run one after another, so the batch is drained before another source starts
+                self._source = stage
+            yield from batch
+
+    def _pull(self, iterator, count_unique):
+        """Take the next batch of items, crediting each to its source if counting unique items"""
+        if not count_unique:
+            return list(islice(iterator, self.batch_size))
+        batch = []
+        for item in islice(iterator, self.batch_size):
+            batch.append(item)
+            if self._source is not None:
+                self._source.unique_count += 1
+        return batch
+
+    @contextmanager
+    def running(self, name, kind="filter"):
+        """Charge the time of a with block (e.g. loading the exclusion list) to name"""
+        if not self.enabled:
+            yield
+            return
+        self._charge()
+        self._stack.append(self.stage(name, kind))
+        self._update_profiler()
+        try:
+            yield
+        finally:
+            self._charge()
+            self._stack.pop()
+            self._update_profiler()
+
+    def finish_stage(self, name):
+        """Report a stage that will not run again, e.g. an exhausted generator"""
+        stage = self.stages.get(name)
+        if stage is None or stage.finished:
+            return
+        self._share_cpu(time.perf_counter())
+        stage.finished = True
+        if self.callback:
+            self.callback(stage)
+
+    def finish(self, written_count=None):
+        """Stop the clocks, fill in the stage inputs and report the remaining stages"""
+        if not self.enabled or self._stack[0].finished:
+            return
+        self._charge()
+        now = time.perf_counter()
+        self._share_cpu(now)
+        # Streams abandoned by a cancel or an early stop may still be on the stack
+        del self._stack[1:]
+        if self._profiler:
+            self._profiler.disable()
+            self.profile = pstats.Stats(self._profiler)
+            self._profiler = None
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        self.wall_time = now - self._start_wall
+        self.cpu_time = time.process_time() - self._start_cpu
+        # CPU used by other threads of this process, such as the compressed writers
+        write = self.stages["write"]
+        write.cpu_time += max(self.cpu_time - (time.thread_time() - self._thread_cpu), 0.0)
+
+        stages = self.ordered_stages()
+        previous_out = sum(stage.items_out for stage in stages if stage.kind == "generator")
+        for stage in stages:
+            if stage.kind == "generator":
+                continue
+            stage.items_in = previous_out
+            if stage.kind == "output":
+                stage.items_out = previous_out if written_count is None else written_count
+            previous_out = stage.items_out
+
+        for stage in stages:
+            self.finish_stage(stage.name)
+
+    def ordered_stages(self):
+        """Generator stages in the order they ran, then dedup, exclusion and write"""
+        stages = [stage for stage in self.stages.values() if stage.kind == "generator"]
+        return stages + [self.stages[name] for name in self.PIPELINE_STAGES if name in self.stages]
+
+    def report(self):
+        """Return the run's metrics as plain data"""
+        return {
+            'wall_time': round(self.wall_time, 6),
+            'cpu_time': round(self.cpu_time, 6),
+            'profile_stage': self.profile_stage,
+            'stages': [stage.to_dict() for stage in self.ordered_stages()]
+        }
+
+    def save_report(self, path):
+        """Write report() to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write("\n")
+
+    def save_profile(self, path):
+        """Write the profiled stage's statistics in pstats format"""
+        if self.profile is not None:
+            self.profile.dump_stats(path)
+
+    def _charge(self):
+        """Charge the time since the last switch to the running stage"""
+        now = time.perf_counter()
+        running = self._stack[-1]
+        elapsed = now - self._last
+        running.wall_time += elapsed
+        running._window_wall += elapsed
+        self._last = now
+        if self.track_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            if peak > running.peak_memory:
+                running.peak_memory = peak
+            tracemalloc.reset_peak()
+        if now - self._window_start >= self.CPU_WINDOW:
+            self._share_cpu(now)
+
+    def _share_cpu(self, now):
+        """Split this thread's CPU time since the last window by each stage's wall time in it"""
+        window_wall = now - self._window_start
+        cpu = time.thread_time()
+        window_cpu = cpu - self._window_cpu
+        for stage in self.stages.values():
+            if stage._window_wall:
+                if window_wall > 0:
+                    stage.cpu_time += window_cpu * stage._window_wall / window_wall
+                stage._window_wall = 0.0
+        self._window_start = now
+        self._window_cpu = cpu
+
+    def _update_profiler(self):
+        """Profile only while the chosen stage itself is running"""
+        if self._profiler is None:
+            return
+        wanted = self._stack[-1].name == self.profile_stage
+        if wanted != self._profiling:
+            if wanted:
+                self._profiler.enable()
+            else:
+                self._profiler.disable()
+            self._profiling = wanted
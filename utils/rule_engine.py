@@ -0,0 +1,279 @@
+"""
+Mangling rule engine: templates loaded from data/mangling_rules.txt
+"""
+
+import os
+import re
+import sys
+from string import Formatter
+
+from .text_utils import TextUtils
+
+def _reverse(text):
+    return text[::-1]
+
+def _duplicate(text):
+    return text + text
+
+# Transforms usable as {slot:transform}; None marks the plain slot
+TRANSFORMS = {
+    None: None,
+    "reverse": _reverse,
+    "leet": TextUtils.to_leetspeak,
+    "upper": str.upper,
+    "lower": str.lower,
+    "capitalize": str.capitalize,
+    "toggle": str.swapcase,
+    "duplicate": _duplicate
+}
+
+# Transforms that never change a string's length or byte size
+SIZE_PRESERVING = {None, "reverse", "leet"}
+
+class BoundRules:
+    """A rule section with every slot except {word} filled in
+
+    Templates that use {word} once and unchanged reduce to
+    prefix + word + suffix, so expanding them is one list comprehension.
+    """
+
+    def __init__(self, entries):
+        # (added_length, prefix, suffix, parts); parts is None on the fast path
+        self.entries = entries
+        self.simple = [(added, prefix, suffix) for added, prefix, suffix, parts in entries if parts is None]
+        self.all_simple = len(self.simple) == len(entries)
+
+    @classmethod
+    def chain(cls, bound_rules):
+        """Combine several bound sections, applied one after another to each word"""
+        return cls([entry for bound in bound_rules for entry in bound.entries])
+
+    def expand_all(self, words, min_len=0, max_len=sys.maxsize):
+        """Return the candidates built from each word in turn, within the length bounds"""
+        if self.all_simple:
+            simple = self.simple
+            return [prefix + word + suffix for word in words for added, prefix, suffix in simple
+                    if min_len <= len(word) + added <= max_len]
+        return [candidate for word in words for candidate in self.expand(word, min_len, max_len)]
+
+    def expand(self, word, min_len=0, max_len=sys.maxsize):
+        """Return the candidates built from word, in template order, within the length bounds"""
+        n = len(word)
+        if self.all_simple:
+            return [prefix + word + suffix for added, prefix, suffix in self.simple
+                    if min_len <= n + added <= max_len]
+
+        candidates = []
+        for added, prefix, suffix, parts in self.entries:
+            if parts is None:
+                if min_len <= n + added <= max_len:
+                    candidates.append(prefix + word + suffix)
+            else:
+                candidate = ''.join(part if isinstance(part, str) else part(word) for part in parts)
+                if min_len <= len(candidate) <= max_len:
+                    candidates.append(candidate)
+        return candidates
+
+class RuleSet:
+    """The compiled templates of one [section]"""
+
+    MAX_BOUND_CACHE = 65536
+
+    def __init__(self, name, templates, slots=None):
+        """Compile templates, rejecting any slot not in slots (None allows every slot)"""
+        self.name = name
+        self.templates = [self.compile_template(template) for template in templates]
+        if slots is not None:
+            for template, parts in zip(templates, self.templates):
+                for part in parts:
+                    if not isinstance(part, str) and part[0] not in slots:
+                        raise ValueError(f"Bad mangling rule '{template}' in [{name}]: unknown slot "
+                                         f"{{{part[0]}}}, use {', '.join(f'{{{slot}}}' for slot in sorted(slots))}")
+        self._bound = {}
+
+    @staticmethod
+    def compile_template(template):
+        """Split a template into literal strings and (slot, transform) pairs"""
+        parts = []
+        try:
+            parsed = list(Formatter().parse(template))
+        except ValueError as e:
+            raise ValueError(f"Bad mangling rule '{template}': {e}")
+
+        for literal, slot, transform, conversion in parsed:
+            if literal:
+                parts.append(literal)
+            if slot is None:
+                continue
+            if not slot or conversion:
+                raise ValueError(f"Bad mangling rule '{template}': use {{name}} or {{name:transform}}")
+            transform = transform or None
+            if transform not in TRANSFORMS:
+                raise ValueError(f"Bad mangling rule '{template}': unknown transform '{transform}'")
+            parts.append((slot, transform))
+        return tuple(parts)
+
+    def without(self, other):
+        """Return a copy without the templates other also has, e.g. ones another generator expands"""
+        covered = set(other.templates)
+        rule_set = RuleSet(self.name, [])
+        rule_set.templates = [parts for parts in self.templates if parts not in covered]
+        return rule_set
+
+    def bind(self, **values):
+        """Fill every slot except {word}, returning cached BoundRules"""
+        key = tuple(sorted(values.items()))
+        bound = self._bound.get(key)
+        if bound is not None:
+            return bound
+
+        entries = []
+        for parts in self.templates:
+            filled = []
+            for part in parts:
+                if isinstance(part, str):
+                    filled.append(part)
+                    continue
+                slot, transform = part
+                if slot == "word":
+                    filled.append(part)
+                elif slot in values:
+                    value = values[slot]
+                    filled.append(value if transform is None else TRANSFORMS[transform](value))
+                else:
+                    raise ValueError(f"Mangling rule section [{self.name}] needs a value for {{{slot}}}")
+            entries.append(self._reduce(filled))
+
+        if len(self._bound) >= self.MAX_BOUND_CACHE:
+            self._bound.clear()
+        bound = BoundRules(entries)
+        self._bound[key] = bound
+        return bound
+
+    @staticmethod
+    def _reduce(filled):
+        """Turn filled parts into a bound entry, using prefix/suffix when {word} is plain and used once"""
+        word_parts = [i for i, part in enumerate(filled) if not isinstance(part, str)]
+        if len(word_parts) == 1 and filled[word_parts[0]][1] is None:
+            prefix = ''.join(filled[:word_parts[0]])
+            suffix = ''.join(filled[word_parts[0] + 1:])
+            return len(prefix) + len(suffix), prefix, suffix, None
+
+        # Merge adjacent literals and resolve the transforms once
+        parts = []
+        for part in filled:
+            if isinstance(part, str):
+                if parts and isinstance(parts[-1], str):
+                    parts[-1] += part
+                else:
+                    parts.append(part)
+            else:
+                parts.append(TRANSFORMS[part[1]] or str)
+        return None, None, None, tuple(parts)
+
+    def length_range(self, **ranges):
+        """Shortest and longest candidate given (shortest, longest) lengths for each slot
+
+        Used to skip whole loops; transforms that may change lengths make
+        the range unbounded.
+        """
+        shortest, longest = sys.maxsize, 0
+        for parts in self.templates:
+            low = high = 0
+            for part in parts:
+                if isinstance(part, str):
+                    low += len(part)
+                    high += len(part)
+                    continue
+                slot, transform = part
+                if transform not in SIZE_PRESERVING:
+                    return 0, sys.maxsize
+                slot_shortest, slot_longest = ranges[slot]
+                low += slot_shortest
+                high += slot_longest
+            shortest, longest = min(shortest, low), max(longest, high)
+        return shortest, longest
+
+    def size_additions(self, **sizes):
+        """(word copies, extra length, extra bytes) per template, given (length, bytes) for the other slots
+
+        Exact for size-preserving transforms; other transforms are counted
+        as if they kept the size.
+        """
+        additions = []
+        for parts in self.templates:
+            copies = extra_length = extra_bytes = 0
+            for part in parts:
+                if isinstance(part, str):
+                    extra_length += len(part)
+                    extra_bytes += len(part.encode('utf-8'))
+                    continue
+                slot, transform = part
+                multiplier = 2 if transform == "duplicate" else 1
+                if slot == "word":
+                    copies += multiplier
+                else:
+                    extra_length += multiplier * sizes[slot][0]
+                    extra_bytes += multiplier * sizes[slot][1]
+            additions.append((copies, extra_length, extra_bytes))
+        return additions
+
+class ManglingRules:
+    """All rule sections from a rules file, compiled once"""
+
+    FILENAME = "mangling_rules.txt"
+    SECTION_HEADER = re.compile(r"\[(\w+)\]")
+
+    # Slots the generators fill in for each section they apply
+    SECTION_SLOTS = {
+        "common_password_patterns": {"word", "pattern"},
+        "common_password_specials": {"word", "char"},
+        "common_word_patterns": {"word", "pattern"},
+        "date_affixes": {"word"},
+        "date_commons": {"word", "date"},
+        "date_variants": {"word"},
+        "word_patterns": {"word", "pattern"},
+        "word_specials": {"word", "char"},
+        "smart_word_commons": {"word", "common"},
+        "smart_date_commons": {"word", "date"},
+        "smart_word_dates": {"word", "date"},
+        "smart_word_patterns": {"word", "pattern"}
+    }
+    ALL_SLOTS = {"word", "pattern", "char", "date", "common"}
+
+    def __init__(self, lines):
+        sections = {}
+        current = None
+        for line in lines:
+            header = self.SECTION_HEADER.fullmatch(line)
+            if header:
+                current = sections.setdefault(header.group(1), [])
+            elif current is None:
+                raise ValueError(f"Mangling rule '{line}' is outside a [section]")
+            else:
+                current.append(line)
+
+        # Sections no generator uses may only name slots some generator fills
+        self.sections = {name: RuleSet(name, templates, self.SECTION_SLOTS.get(name, self.ALL_SLOTS))
+                         for name, templates in sections.items()}
+
+    def section(self, name):
+        """Return the compiled RuleSet for a section (empty if the file omits it)"""
+        rule_set = self.sections.get(name)
+        if rule_set is None:
+            rule_set = self.sections[name] = RuleSet(name, [])
+        return rule_set
+
+    _default = None
+
+    @classmethod
+    def default(cls):
+        """Rules from the bundled data/mangling_rules.txt, shared process-wide (empty if missing)"""
+        if cls._default is None:
+            path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", cls.FILENAME)
+            lines = []
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    lines = [line.strip() for line in f]
+            cls._default = cls([line for line in lines if line and not line.startswith('#')])
+        return cls._default
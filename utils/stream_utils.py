@@ -0,0 +1,63 @@
+"""
+Streaming helpers for lazily processing large candidate streams
+"""
+
+from itertools import islice
+from zlib import crc32
+
+class GenerationCancelled(Exception):
+    """Raised when a running generation is cancelled by the user"""
+
+class StreamUtils:
+    DEFAULT_BATCH_SIZE = 10000
+
+    @staticmethod
+    def batched(items, batch_size=DEFAULT_BATCH_SIZE):
+        """Yield lists of at most batch_size items from any iterable"""
+        iterator = iter(items)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    @staticmethod
+    def unique(items, seen=None):
+        """Yield items in first-seen order, skipping duplicates and anything already in seen"""
+        seen = set() if seen is None else seen
+        for item in items:
+            if item not in seen:
+                seen.add(item)
+                yield item
+
+    @staticmethod
+    def hash_shard(items, shard_index, shard_count):
+        """Yield the items whose CRC32 falls in this shard, the same on every machine"""
+        for item in items:
+            if crc32(item.encode('utf-8')) % shard_count == shard_index:
+                yield item
+
+    @staticmethod
+    def mark_last(items):
+        """Yield (item, is_last) pairs using a single item of lookahead"""
+        iterator = iter(items)
+        try:
+            previous = next(iterator)
+        except StopIteration:
+            return
+        for item in iterator:
+            yield previous, False
+            previous = item
+        yield previous, True
+
+    @staticmethod
+    def cancellable(items, cancel_event, batch_size=DEFAULT_BATCH_SIZE):
+        """Pass items through, raising GenerationCancelled at batch boundaries once cancel_event is set"""
+        if cancel_event is None:
+            yield from items
+            return
+
+        for i, item in enumerate(items):
+            if i % batch_size == 0 and cancel_event.is_set():
+                raise GenerationCancelled("Generation cancelled")
+            yield item
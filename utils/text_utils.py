@@ -2,39 +2,156 @@
 Text processing utilities
 """
 
+from functools import lru_cache
+from itertools import product
+
+# Per-character (lower, upper) choices, filled in lazily and shared by all callers
+_CASE_CHOICES = {}
+
+def _compute_case_variations(word, mode):
+    """Uncached case expansion behind the shared LRU cache"""
+    if mode == TextUtils.CASE_MODE_BASIC:
+        return tuple(TextUtils.generate_basic_case_variations(word))
+    return tuple(TextUtils.generate_all_case_variations(word, mode))
+
 class TextUtils:
+    CASE_MODE_BASIC = "basic"
+    CASE_MODE_COMPAT = "compat"
+    CASE_MODE_EXTENDED = "extended"
+    MAX_CASE_LETTERS = 10
+    CASE_CACHE_SIZE = 1024  # Entries, each up to 2^MAX_CASE_LETTERS variants
+
+    # Bounded LRU of variation tuples keyed by (word, mode), shared process-wide
+    _case_cache = lru_cache(maxsize=CASE_CACHE_SIZE)(_compute_case_variations)
+
+    @staticmethod
+    def cached_case_variations(word, mode):
+        """Return the case variations of word for mode as a shared, memoized tuple"""
+        return TextUtils._case_cache(word, mode)
+
+    @staticmethod
+    def case_variations(word, mode):
+        """Return the case variations of word for mode without touching the shared cache"""
+        return _compute_case_variations(word, mode)
+
     @staticmethod
-    def generate_all_case_variations(word):
-        """Generate ALL possible upper/lowercase combinations for a word"""
-        if not word or not word.isalpha():
-            return [word]  # Return original if not all letters
+    def case_cache_info():
+        """Return (hits, misses, maxsize, currsize) for the case variation cache"""
+        return TextUtils._case_cache.cache_info()
+
+    @staticmethod
+    def set_case_cache_size(maxsize):
+        """Replace the case variation cache with an empty one of the given size"""
+        TextUtils._case_cache = lru_cache(maxsize=maxsize)(_compute_case_variations)
+
+    @staticmethod
+    def case_choices(char):
+        """Return the distinct case forms of a character, e.g. ('a', 'A') or ('1',)"""
+        choices = _CASE_CHOICES.get(char)
+        if choices is None:
+            choices = tuple(dict.fromkeys((char.lower(), char.upper())))
+            _CASE_CHOICES[char] = choices
+        return choices
+
+    @staticmethod
+    def iter_case_variations(word):
+        """Lazily yield every upper/lowercase combination of the word's letters
+
+        Characters without case (digits, symbols) stay as they are, so mixed
+        words like 'pass123' vary only their letters.
+        """
+        choices = [TextUtils.case_choices(char) for char in word]
+        variations = map(''.join, product(*choices))
+
+        # Multi-character forms (e.g. 'ß' -> 'SS') are the only way two choices can collide
+        if any(len(option) != 1 for options in choices for option in options):
+            return iter(dict.fromkeys(variations))
+        return variations
+
+    @staticmethod
+    def count_case_letters(word):
+        """Count the characters that have more than one case form"""
+        return sum(1 for char in word if len(TextUtils.case_choices(char)) > 1)
+
+    @staticmethod
+    def generate_all_case_variations(word, mode=CASE_MODE_COMPAT):
+        """Generate ALL possible upper/lowercase combinations for a word
+
+        In compat mode only all-letter words are expanded, matching the
+        original behaviour; extended mode also expands the letters of mixed
+        alphanumeric words.
+        """
+        if not word:
+            return [word]
+
+        if mode == TextUtils.CASE_MODE_COMPAT:
+            if not word.isalpha():
+                return [word]  # Return original if not all letters
+            letter_count = len(word)
+        else:
+            letter_count = TextUtils.count_case_letters(word)
 
         # Limit to reasonable length to prevent memory explosion
-        if len(word) > 10:
+        if letter_count > TextUtils.MAX_CASE_LETTERS:
             # For very long words, just return basic variations
             return TextUtils.generate_basic_case_variations(word)
 
-        variations = []
-        # Generate all 2^n combinations where n is the length of the word
-        for i in range(2 ** len(word)):
-            variation = ""
-            for j, char in enumerate(word):
-                if char.isalpha():
-                    # Check if bit j is set in i
-                    if (i >> j) & 1:
-                        variation += char.upper()
-                    else:
-                        variation += char.lower()
-                else:
-                    variation += char
-            variations.append(variation)
-
-        return list(set(variations))  # Remove duplicates
+        return list(TextUtils.iter_case_variations(word))
+
+    @staticmethod
+    def case_variation_sizes(word, mode):
+        """Count the case variations of word by (length, UTF-8 byte length) without building them
+
+        The counts match cached_case_variations(word, mode) entry for entry.
+        """
+        if mode == TextUtils.CASE_MODE_BASIC:
+            return TextUtils.count_sizes(TextUtils.generate_basic_case_variations(word))
+
+        if not word or (mode == TextUtils.CASE_MODE_COMPAT and not word.isalpha()):
+            return TextUtils.count_sizes([word])
+
+        letter_count = len(word) if mode == TextUtils.CASE_MODE_COMPAT else TextUtils.count_case_letters(word)
+        if letter_count > TextUtils.MAX_CASE_LETTERS:
+            return TextUtils.count_sizes(TextUtils.generate_basic_case_variations(word))
+
+        choices = [TextUtils.case_choices(char) for char in word]
+        if any(len(option) != 1 for options in choices for option in options):
+            # Multi-character forms can collide, so count the deduplicated variations
+            return TextUtils.count_sizes(TextUtils.cached_case_variations(word, mode))
+
+        # Every combination has the same length; only the byte length can differ per choice
+        sizes = {(0, 0): 1}
+        for options in choices:
+            sizes = TextUtils.combine_sizes(sizes, TextUtils.count_sizes(options))
+        return sizes
+
+    @staticmethod
+    def combine_sizes(first, second):
+        """Size counts for every concatenation of an item counted in first with one in second"""
+        combined = {}
+        for (length, byte_length), count in first.items():
+            for (other_length, other_bytes), other_count in second.items():
+                key = (length + other_length, byte_length + other_bytes)
+                combined[key] = combined.get(key, 0) + count * other_count
+        return combined
+
+    @staticmethod
+    def count_sizes(texts):
+        """Count strings by (length, UTF-8 byte length)"""
+        sizes = {}
+        for text in texts:
+            key = (len(text), len(text.encode('utf-8')))
+            sizes[key] = sizes.get(key, 0) + 1
+        return sizes
 
     @staticmethod
     def generate_basic_case_variations(word):
-        """Generate basic case variations"""
-        return [word, word.lower(), word.upper(), word.capitalize()]
+        """Generate basic case variations, each distinct form once
+
+        Deduplicating these few forms here keeps every template expansion of
+        the word from multiplying the repeats.
+        """
+        return list(dict.fromkeys((word, word.lower(), word.upper(), word.capitalize())))
 
     @staticmethod
     def to_leetspeak(word):
@@ -84,4 +201,4 @@ class TextUtils:
                         dates.append(numbers[2:])   # Skip first 2 digits
                         dates.append(numbers[:-2])  # Skip last 2 digits
 
-        return list(set(dates))  # Remove duplicates
+        return list(dict.fromkeys(dates))  # Remove duplicates, keeping a deterministic order
@@ -0,0 +1,135 @@
+"""
+Memory-mapped wordlist that is read lazily instead of loaded into a list
+"""
+
+import mmap
+import os
+import re
+import sys
+from array import array
+from itertools import islice
+
+# Start of a line whose first non-blank byte is not '#', i.e. of an entry
+_ENTRY_START = re.compile(rb'^[^\S\n]*[^\s#]', re.MULTILINE)
+# An entry line, capturing the entry without its leading blanks
+_ENTRY_LINE = re.compile(rb'^[^\S\n]*([^\s#][^\n]*)', re.MULTILINE)
+
+class MappedWordlist:
+    """Read-only sequence of the entries of a large text wordlist
+
+    The file is memory-mapped and decoded one line at a time, skipping blank
+    lines and '#' comments like DataLoader does. Iteration and prefix slices
+    such as [:50] only read as far as they need; len() and other indexing
+    build an array of entry offsets (8 bytes per entry) on first use, with
+    one regex scan of the mapped file rather than decoding every line.
+    """
+
+    def __init__(self, file_path):
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"Wordlist not found: {file_path}")
+        self.file_path = file_path
+        self._file = None
+        self._map = None
+        self._offsets = None
+        self._length_range = None
+
+    def __getstate__(self):
+        """Send only the path to a worker process; it maps the file itself"""
+        return {'file_path': self.file_path, '_file': None, '_map': None, '_offsets': None,
+                '_length_range': self._length_range}
+
+    def _mapped(self):
+        """Return the file's memory map, or None for an empty file"""
+        if self._file is None:
+            self._file = open(self.file_path, 'rb')
+            if os.fstat(self._file.fileno()).st_size:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    @staticmethod
+    def _entry(line):
+        """Decode one raw line, returning None for blank lines and comments"""
+        entry = line.strip()
+        if not entry or entry.startswith(b'#'):
+            return None
+        return entry.decode('utf-8', errors='replace')
+
+    def _iter_lines(self):
+        """Yield (offset, raw line) for every line of the file"""
+        data = self._mapped()
+        if data is None:
+            return
+        position = 0
+        size = len(data)
+        while position < size:
+            end = data.find(b'\n', position)
+            end = size if end < 0 else end + 1
+            yield position, data[position:end]
+            position = end
+
+    def __iter__(self):
+        for _, line in self._iter_lines():
+            entry = self._entry(line)
+            if entry is not None:
+                yield entry
+
+    def _build_offsets(self):
+        """Index the start of every entry"""
+        if self._offsets is None:
+            data = self._mapped()
+            offsets = array('Q')
+            if data is not None:
+                offsets.extend(match.start() for match in _ENTRY_START.finditer(data))
+            self._offsets = offsets
+        return self._offsets
+
+    def length_range(self):
+        """Return the (shortest, longest) entry length, scanning the file once on first use"""
+        if self._length_range is None:
+            shortest, longest = sys.maxsize, 0
+            data = self._mapped()
+            if data is not None:
+                for match in _ENTRY_LINE.finditer(data):
+                    entry = match.group(1).rstrip()
+                    length = len(entry) if entry.isascii() else len(entry.decode('utf-8', errors='replace'))
+                    if length < shortest:
+                        shortest = length
+                    if length > longest:
+                        longest = length
+            self._length_range = (shortest, longest)
+        return self._length_range
+
+    def __len__(self):
+        return len(self._build_offsets())
+
+    def __bool__(self):
+        return next(iter(self), None) is not None
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.start, key.stop, key.step
+            # Forward slices from the start never need the offset index
+            if self._offsets is None and (start or 0) >= 0 and (stop is None or stop >= 0) and (step or 1) > 0:
+                return list(islice(self, start, stop, step))
+            return [self[index] for index in range(*key.indices(len(self)))]
+
+        offsets = self._build_offsets()
+        if key < 0:
+            key += len(offsets)
+        if not 0 <= key < len(offsets):
+            raise IndexError("wordlist index out of range")
+        data = self._mapped()
+        end = data.find(b'\n', offsets[key])
+        return self._entry(data[offsets[key]:end if end >= 0 else len(data)])
+
+    def close(self):
+        """Unmap the file; it is mapped again if the wordlist is used afterwards"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __repr__(self):
+        return f"MappedWordlist({self.file_path!r})"